@@ -0,0 +1,90 @@
+"""Throughput and output parity of the TextRank summarizer against newspaper's Article.nlp().
+
+Run from backend_matrix:
+
+    python -m benchmarks.summarizer_bench [saved_pages/] [--document-cache] [--repeat 3]
+
+Without paths the articles of the fixed corpus in ``benchmarks/corpus`` are
+summarized, the same pages the extraction benchmark uses. Otherwise pages are
+``.html``/``.htm`` files under the given paths and, with ``--document-cache``,
+the pages kept by the crawler's on-disk document cache.
+Each page is parsed once with newspaper; only summarizing is timed. Overlap is
+measured against the summaries newspaper produces today.
+"""
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from newspaper import Article  # noqa: E402
+
+from benchmarks.text_extraction_bench import CORPUS_DIR, load_corpus, token_overlap  # noqa: E402
+from fc.article_service import load_nltk_data  # noqa: E402
+from fc.summarizer import summarize  # noqa: E402
+
+
+def parse_pages(pages):
+    articles = []
+    for page in pages:
+        article = Article("https://example.com/article")
+        article.download(input_html=page)
+        try:
+            article.parse()
+        except Exception:
+            continue
+        if article.text.strip():
+            articles.append(article)
+    return articles
+
+
+def newspaper_summary(article) -> str:
+    article.nlp()
+    return article.summary
+
+
+def textrank_summary(article) -> str:
+    return summarize(article.text, article.title)
+
+
+def sentence_overlap(reference: str, summary: str) -> float:
+    """Share of the reference summary's sentences also picked by ``summary``."""
+    expected = {" ".join(line.split()) for line in reference.splitlines() if line.strip()}
+    picked = {" ".join(line.split()) for line in summary.splitlines() if line.strip()}
+    return len(expected & picked) / len(expected) if expected else 1.0
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("paths", nargs="*", help="HTML files or directories of saved pages, default: the fixed corpus")
+    parser.add_argument("--document-cache", action="store_true", help="also use pages from the on-disk document cache")
+    parser.add_argument("--repeat", type=int, default=3, help="timed passes per summarizer, the best one is reported")
+    args = parser.parse_args()
+
+    articles = parse_pages(load_corpus(args.paths or [CORPUS_DIR], args.document_cache))
+    if not articles:
+        parser.error("no articles found")
+    load_nltk_data()
+    words = sum(len(article.text.split()) for article in articles)
+    print(f"{len(articles)} articles, {words / len(articles):.0f} words on average\n")
+
+    summarizers = {"newspaper": newspaper_summary, "textrank": textrank_summary}
+    reference = None
+    baseline = None
+    print(f"{'summarizer':<12}{'summaries/s':>13}{'speedup':>10}{'sentences':>11}{'overlap':>10}")
+    for name, summarizer in summarizers.items():
+        best = float("inf")
+        for _ in range(args.repeat):
+            start = time.perf_counter()
+            summaries = [summarizer(article) for article in articles]
+            best = min(best, time.perf_counter() - start)
+        reference = reference or summaries
+        baseline = baseline or best
+        sentences = sum(sentence_overlap(ref, summary) for ref, summary in zip(reference, summaries)) / len(articles)
+        overlap = sum(token_overlap(ref, summary) for ref, summary in zip(reference, summaries)) / len(articles)
+        print(f"{name:<12}{len(articles) / best:>13.1f}{baseline / best:>9.1f}x{sentences:>11.1%}{overlap:>10.1%}")
+
+
+if __name__ == "__main__":
+    main()
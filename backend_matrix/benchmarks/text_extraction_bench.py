@@ -0,0 +1,91 @@
+"""Throughput and output parity of the HTML-to-text extraction backends.
+
+Run from backend_matrix:
+
+    python -m benchmarks.text_extraction_bench [saved_pages/] [--document-cache] [--repeat 3]
+
+Without paths the fixed corpus in ``benchmarks/corpus`` is used: eight news
+articles (fictional, written for the benchmark) wrapped in the page furniture
+real sites carry, such as navigation, inline scripts and JSON state, cookie
+banners, ads, comment threads, table layouts and non-ASCII text. Otherwise
+pages are ``.html``/``.htm`` files under the given paths and, with
+``--document-cache``, the pages kept by the crawler's on-disk document cache.
+Every backend is compared against the ``bs4`` backend, which implements the
+original ``is_tag_visible`` semantics.
+"""
+import argparse
+import os
+import sys
+import time
+import zlib
+from collections import Counter
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from fc.kv_store import CACHE_DIR  # noqa: E402
+from fc.text_extraction import BACKENDS  # noqa: E402
+
+CORPUS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "corpus")
+
+
+def load_corpus(paths, document_cache: bool):
+    pages = []
+    files = []
+    for path in paths:
+        if os.path.isdir(path):
+            for dirpath, _, filenames in os.walk(path):
+                files += [os.path.join(dirpath, f) for f in filenames if f.endswith((".html", ".htm"))]
+        else:
+            files.append(path)
+    for file in sorted(files):
+        with open(file, "rb") as f:
+            pages.append(f.read().decode("utf-8", errors="replace"))
+    if document_cache:
+        for dirpath, _, filenames in os.walk(os.path.join(CACHE_DIR, "documents")):
+            for filename in filenames:
+                if filename.endswith(".z"):
+                    with open(os.path.join(dirpath, filename), "rb") as f:
+                        pages.append(zlib.decompress(f.read()).decode("utf-8", errors="replace"))
+    return pages
+
+
+def token_overlap(reference: str, text: str) -> float:
+    """Share of words the two texts have in common, ignoring order."""
+    a, b = Counter(reference.split()), Counter(text.split())
+    total = max(sum(a.values()), sum(b.values()))
+    return sum((a & b).values()) / total if total else 1.0
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("paths", nargs="*", help="HTML files or directories of saved pages, default: the fixed corpus")
+    parser.add_argument("--document-cache", action="store_true", help="also use pages from the on-disk document cache")
+    parser.add_argument("--repeat", type=int, default=3, help="timed passes per backend, the best one is reported")
+    args = parser.parse_args()
+
+    pages = load_corpus(args.paths or [CORPUS_DIR], args.document_cache)
+    if not pages:
+        parser.error("no pages found")
+    size_mb = sum(len(page.encode("utf-8")) for page in pages) / 1e6
+    print(f"{len(pages)} pages, {size_mb:.2f} MB, backends: {', '.join(BACKENDS)}\n")
+
+    reference = [BACKENDS["bs4"](page) for page in pages]
+    print(f"{'backend':<12}{'pages/s':>10}{'MB/s':>10}{'speedup':>10}{'identical':>12}{'overlap':>10}")
+    baseline = None
+    for name, extract in BACKENDS.items():
+        best = float("inf")
+        for _ in range(args.repeat):
+            start = time.perf_counter()
+            texts = [extract(page) for page in pages]
+            best = min(best, time.perf_counter() - start)
+        baseline = baseline or best
+        identical = sum(text == ref for text, ref in zip(texts, reference)) / len(pages)
+        overlap = sum(token_overlap(ref, text) for text, ref in zip(texts, reference)) / len(pages)
+        print(
+            f"{name:<12}{len(pages) / best:>10.1f}{size_mb / best:>10.2f}{baseline / best:>9.1f}x"
+            f"{identical:>11.1%}{overlap:>10.1%}"
+        )
+
+
+if __name__ == "__main__":
+    main()
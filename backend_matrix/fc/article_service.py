@@ -0,0 +1,260 @@
+import asyncio
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict, Optional, Tuple
+
+import nltk
+import requests
+from newspaper import Article, Config
+from nltk.tokenize import PunktTokenizer
+
+from .kv_store import TTLStore
+from .parse_pool import parse_map, parse_map_sync, register_worker_initializer
+from .summarizer import ARTICLE_SUMMARIZER, summarize
+from .url_utils import canonicalize_url
+
+
+ARTICLE_CACHE_TTL = float(os.getenv("ARTICLE_CACHE_TTL", str(24 * 3600)))
+ARTICLE_CACHE_MAX_ENTRIES = int(os.getenv("ARTICLE_CACHE_MAX_ENTRIES", "20000"))
+# Parsed articles also kept in memory, so hot URLs skip the database as well
+ARTICLE_MEMORY_CACHE_SIZE = int(os.getenv("ARTICLE_MEMORY_CACHE_SIZE", "1000"))
+ARTICLE_FETCH_TIMEOUT = float(os.getenv("ARTICLE_FETCH_TIMEOUT", "10"))
+# How long an expired article is kept to be revalidated with ETag / Last-Modified instead of re-parsed
+ARTICLE_REVALIDATE_TTL = float(os.getenv("ARTICLE_REVALIDATE_TTL", str(7 * 24 * 3600)))
+
+nltk_data_dir = "nltk_data"
+if nltk_data_dir not in nltk.data.path:
+    nltk.data.path.insert(0, nltk_data_dir)
+
+
+def load_nltk_data():
+    """Check that the bundled punkt_tab sentence tokenizer loads, which newspaper's ``Article.nlp()`` needs.
+
+    nltk 3.9 reads ``tokenizers/punkt_tab/english/``; nltk_data ships no punkt pickles.
+    Run in every parse pool worker, so missing data fails at startup rather than per article.
+
+    Raises:
+        LookupError: punkt_tab is missing from ``nltk.data.path``.
+    """
+    PunktTokenizer("english")
+
+
+def parse_article(url: str, html: str) -> Dict:
+    """Parse and summarize one article page with newspaper; runs in the parse pool.
+
+    The summary comes from ``Article.nlp()``, or from ``summarize`` when
+    ARTICLE_SUMMARIZER is "textrank".
+
+    Returns:
+        dict: the article's ``title``, ``summary`` and ``text``.
+    """
+    article = Article(url)
+    article.download(input_html=html)
+    article.parse()
+    if ARTICLE_SUMMARIZER == "textrank":
+        return {"title": article.title, "summary": summarize(article.text, article.title), "text": article.text}
+    article.nlp()
+    return {"title": article.title, "summary": article.summary, "text": article.text}
+
+
+register_worker_initializer(load_nltk_data)
+
+
+class ArticleService:
+    def __init__(
+        self,
+        ttl: float = ARTICLE_CACHE_TTL,
+        max_entries: int = ARTICLE_CACHE_MAX_ENTRIES,
+        memory_size: int = ARTICLE_MEMORY_CACHE_SIZE,
+        timeout: float = ARTICLE_FETCH_TIMEOUT,
+        revalidate_ttl: float = ARTICLE_REVALIDATE_TTL,
+    ):
+        """Downloads and parses news articles with newspaper, caching results by canonical URL.
+
+        URLs are canonicalized (tracking parameters and AMP variants removed) before
+        lookup, and after a download the URL it redirected to is cached as well.
+        Parsed articles are kept in a bounded in-memory LRU in front of a persistent
+        TTL store, so a recently seen article costs no network call. Failures are
+        not cached.
+
+        Expired articles are kept for another ``revalidate_ttl`` seconds with the
+        page's ``ETag`` and ``Last-Modified`` headers; they are then re-fetched with
+        a conditional request, and a 304 Not Modified reuses the stored parse.
+        Articles summarized by another ARTICLE_SUMMARIZER are treated as missing.
+
+        Args:
+            ttl (float, optional): seconds a parsed article is served from the cache.
+            max_entries (int, optional): maximum number of articles kept on disk.
+            memory_size (int, optional): maximum number of articles kept in memory.
+            timeout (float, optional): seconds allowed for downloading one article.
+            revalidate_ttl (float, optional): seconds an expired article can still be revalidated.
+        """
+        self.store = TTLStore("articles", ttl=ttl, max_entries=max_entries, stale_ttl=revalidate_ttl)
+        self.ttl = ttl
+        self.memory_size = memory_size
+        self.timeout = timeout
+        # canonical URL -> (stored article, time it was fetched or revalidated)
+        self._memory: "OrderedDict[str, Tuple[Dict, float]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._session = requests.Session()
+        self._session.headers["User-Agent"] = Config().browser_user_agent
+
+    def get(self, url: str, html: Optional[str] = None, with_text: bool = False) -> Dict:
+        """Return ``{status, title, summary, url}`` for ``url``, or ``{status: "error", message}``.
+
+        Blocks the calling thread; parsing itself runs in the parse pool.
+
+        Args:
+            url (str): article URL.
+            html (str, optional): the page source when the caller already downloaded it.
+            with_text (bool, optional): also return the article body as ``text``. Off by default,
+                since results are stored and pushed to clients, where only the summary belongs.
+        """
+        key = canonicalize_url(url)
+        article, stale = self._cached(key)
+        if article is None:
+            try:
+                html, final_url, validators = self._download(url, html, stale)
+                if html is None:
+                    article = self._revalidated(key, stale)
+                else:
+                    parsed = parse_map_sync(parse_article, [final_url], [html])[0]
+                    article = self._remember_parsed(key, final_url, {**parsed, **validators})
+            except Exception as e:
+                return {"status": "error", "message": str(e)}
+        return _response(article, url, with_text)
+
+    async def get_async(self, url: str, html: Optional[str] = None, with_text: bool = False) -> Dict:
+        """Awaitable ``get`` that never blocks the event loop.
+
+        Cache reads and writes and the download run in threads, parsing in the parse pool;
+        only articles already in memory are served without leaving the loop.
+        """
+        key = canonicalize_url(url)
+        article, stale = self._in_memory(key), None
+        if article is None:
+            article, stale = await asyncio.to_thread(self._cached, key)
+        if article is None:
+            try:
+                html, final_url, validators = await asyncio.to_thread(self._download, url, html, stale)
+                if html is None:
+                    article = await asyncio.to_thread(self._revalidated, key, stale)
+                else:
+                    parsed = (await parse_map(parse_article, [final_url], [html]))[0]
+                    article = await asyncio.to_thread(self._remember_parsed, key, final_url, {**parsed, **validators})
+            except Exception as e:
+                return {"status": "error", "message": str(e)}
+        return _response(article, url, with_text)
+
+    def _cached(self, key: str) -> Tuple[Optional[Dict], Optional[Dict]]:
+        """Return ``(fresh article, None)``, ``(None, expired article)`` or ``(None, None)``."""
+        article = self._in_memory(key)
+        if article is not None:
+            return article, None
+        now = time.time()
+        entry = self.store.get_entry(key)
+        if entry is None:
+            return None, None
+        article, age = entry
+        if article.get("summarizer") != ARTICLE_SUMMARIZER:
+            # Revalidating would keep the other summarizer's summary
+            return None, None
+        if age > self.ttl:
+            return None, article
+        self._remember(key, article, now - age)
+        return article, None
+
+    def _in_memory(self, key: str) -> Optional[Dict]:
+        with self._lock:
+            entry = self._memory.get(key)
+            if entry is not None and time.time() - entry[1] <= self.ttl:
+                self._memory.move_to_end(key)
+                return entry[0]
+        return None
+
+    def _remember(self, key: str, article: Dict, fetched_at: float):
+        with self._lock:
+            self._memory[key] = (article, fetched_at)
+            self._memory.move_to_end(key)
+            while len(self._memory) > self.memory_size:
+                self._memory.popitem(last=False)
+
+    def _download(self, url: str, html: Optional[str], stale: Optional[Dict] = None):
+        """Return ``(html, final_url, validators)``, fetching the page unless ``html`` is given.
+
+        With an expired article, the request is conditional on its validators and
+        ``html`` is None if the server answered 304 Not Modified.
+        """
+        if html is not None:
+            return html, url, {}
+        headers = {}
+        if stale is not None:
+            if stale.get("etag"):
+                headers["If-None-Match"] = stale["etag"]
+            if stale.get("last_modified"):
+                headers["If-Modified-Since"] = stale["last_modified"]
+        response = self._session.get(url, timeout=self.timeout, allow_redirects=True, headers=headers)
+        if response.status_code == 304 and headers:
+            return None, response.url, {}
+        response.raise_for_status()
+        validators = {"etag": response.headers.get("ETag"), "last_modified": response.headers.get("Last-Modified")}
+        return _decode_html(response), response.url, validators
+
+    def _revalidated(self, key: str, article: Dict) -> Dict:
+        self.store.touch(key)
+        self._remember(key, article, time.time())
+        return article
+
+    def _remember_parsed(self, key: str, final_url: str, parsed: Dict) -> Dict:
+        parsed = {**parsed, "summarizer": ARTICLE_SUMMARIZER}
+        for cache_key in dict.fromkeys((key, canonicalize_url(final_url))):
+            try:
+                self.store.set(cache_key, parsed)
+            except Exception as e:
+                print(f"Error caching article {cache_key}: {str(e)}")
+            self._remember(cache_key, parsed, time.time())
+        return parsed
+
+
+def _decode_html(response: requests.Response) -> str:
+    """The page as text, in the charset of the Content-Type header, the page's meta tags, or detected.
+
+    ``response.text`` alone falls back to ISO-8859-1 for any HTML served without a charset.
+    """
+    if "charset" in response.headers.get("Content-Type", "").lower():
+        return response.text
+    encodings = requests.utils.get_encodings_from_content(response.content[:4096].decode("ascii", errors="ignore"))
+    for encoding in encodings + [response.apparent_encoding]:
+        if not encoding:
+            continue
+        try:
+            return response.content.decode(encoding, errors="replace")
+        except LookupError:
+            continue
+    return response.content.decode("utf-8", errors="replace")
+
+
+def _response(article: Dict, url: str, with_text: bool = False) -> Dict:
+    response = {
+        "status": "success",
+        "title": article["title"],
+        "summary": article["summary"],
+        "url": url,
+    }
+    if with_text:
+        response["text"] = article["text"]
+    return response
+
+_article_service = None
+_article_service_lock = threading.Lock()
+
+
+def get_article_service() -> ArticleService:
+    """Process-wide article service."""
+    global _article_service
+    with _article_service_lock:
+        if _article_service is None:
+            _article_service = ArticleService()
+    return _article_service
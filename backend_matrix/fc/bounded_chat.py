@@ -0,0 +1,54 @@
+import os
+from collections import deque
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+
+GEMINI_HISTORY_TURNS = int(os.getenv("GEMINI_HISTORY_TURNS", "0"))
+if GEMINI_HISTORY_TURNS < 0:
+    print(f"Error in GEMINI_HISTORY_TURNS={GEMINI_HISTORY_TURNS}: must not be negative, keeping no history")
+    GEMINI_HISTORY_TURNS = 0
+
+
+class BoundedChat:
+    def __init__(self, model, max_turns: int = GEMINI_HISTORY_TURNS):
+        """Chat-style wrapper around a Gemini model that only keeps the last few turns of one report.
+
+        History is kept per ``session()``, opened once per report, so concurrent
+        requests never see each other's prompts. Outside a session, or with
+        ``max_turns=0``, every message is sent on its own, so the cost of a call does
+        not depend on how many calls came before it.
+
+        Args:
+            model (genai.GenerativeModel): prebuilt model, shared across requests.
+            max_turns (int, optional): number of previous user/model exchanges to resend.
+        """
+        if max_turns < 0:
+            raise ValueError(f"max_turns must not be negative, got {max_turns}")
+        self.model = model
+        self.max_turns = max_turns
+        # Tasks started inside a session inherit its history through their copied context
+        self._history: ContextVar = ContextVar(f"bounded_chat_{id(self)}", default=None)
+
+    @contextmanager
+    def session(self):
+        """Start a fresh history for the calls made in the current context (one report)."""
+        token = self._history.set(deque(maxlen=2 * self.max_turns) if self.max_turns > 0 else None)
+        try:
+            yield self
+        finally:
+            self._history.reset(token)
+
+    @property
+    def history(self):
+        return list(self._history.get() or ())
+
+    async def send_message_async(self, message: str):
+        user_turn = {"role": "user", "parts": [message]}
+        history = self._history.get()
+        # Snapshot so calls of the same report never see a half-written exchange
+        contents = list(history or ()) + [user_turn]
+        response = await self.model.generate_content_async(contents)
+        if history is not None:
+            history.extend([user_turn, {"role": "model", "parts": [response.text]}])
+        return response
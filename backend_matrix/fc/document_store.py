@@ -0,0 +1,159 @@
+import asyncio
+import hashlib
+import os
+import threading
+import time
+import zlib
+from dataclasses import dataclass
+from typing import Dict, Optional
+
+from .kv_store import CACHE_DIR, TTLStore
+from .url_utils import normalize_url
+
+
+DOCUMENT_CACHE_TTL = float(os.getenv("DOCUMENT_CACHE_TTL", "3600"))  # 0 disables the on-disk cache
+DOCUMENT_CACHE_MAX_ENTRIES = int(os.getenv("DOCUMENT_CACHE_MAX_ENTRIES", "5000"))
+
+
+@dataclass
+class Document:
+    """Raw HTML of a fetched page; exposes ``url`` and ``text`` like an httpx response.
+
+    ``truncated`` pages were cut off by the crawler's size or time limit and are never cached.
+    """
+
+    url: str
+    text: str
+    truncated: bool = False
+
+
+class DiskDocumentCache:
+    def __init__(self, ttl: float = DOCUMENT_CACHE_TTL, max_entries: int = DOCUMENT_CACHE_MAX_ENTRIES, root: str = None):
+        """Compressed, content-addressed HTML cache shared across requests.
+
+        Pages are stored once per distinct body under their SHA-256, and a URL
+        index maps normalized URLs onto those blobs.
+
+        Args:
+            ttl (float): seconds a cached page stays valid.
+            max_entries (int): maximum number of URLs kept in the index.
+            root (str, optional): blob directory. Defaults to CACHE_DIR/documents.
+        """
+        self.ttl = ttl
+        self.root = root or os.path.join(CACHE_DIR, "documents")
+        os.makedirs(self.root, exist_ok=True)
+        self.index = TTLStore("documents", ttl=ttl, max_entries=max_entries)
+        self._puts = 0
+
+    def _blob_path(self, digest: str) -> str:
+        return os.path.join(self.root, digest[:2], digest + ".z")
+
+    def get(self, key: str) -> Optional[Document]:
+        entry = self.index.get(key)
+        if entry is None:
+            return None
+        try:
+            with open(self._blob_path(entry["sha256"]), "rb") as f:
+                return Document(url=entry["url"], text=zlib.decompress(f.read()).decode("utf-8"))
+        except (OSError, zlib.error):
+            self.index.delete(key)
+            return None
+
+    def put(self, key: str, document: Document):
+        raw = document.text.encode("utf-8")
+        digest = hashlib.sha256(raw).hexdigest()
+        path = self._blob_path(digest)
+        if os.path.exists(path):
+            os.utime(path)
+        else:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+            with open(tmp_path, "wb") as f:
+                f.write(zlib.compress(raw))
+            os.replace(tmp_path, path)
+        self.index.set(key, {"sha256": digest, "url": document.url})
+
+        self._puts += 1
+        if self._puts % 100 == 0:
+            self.purge()
+
+    def purge(self):
+        """Drop expired index entries and blobs that have not been written within the TTL."""
+        self.index.purge_expired()
+        cutoff = time.time() - self.ttl
+        for dirpath, _, filenames in os.walk(self.root):
+            for filename in filenames:
+                path = os.path.join(dirpath, filename)
+                try:
+                    if os.path.getmtime(path) < cutoff:
+                        os.remove(path)
+                except OSError:
+                    pass
+
+
+class DocumentStore:
+    def __init__(self, disk_cache: Optional[DiskDocumentCache] = None):
+        """Request-scoped store of raw HTML keyed by normalized URL.
+
+        Lets the snippet extender and the article summarizer share a single download
+        of every evidence page. Lookups fall through to ``disk_cache`` when given.
+
+        Args:
+            disk_cache (DiskDocumentCache, optional): persistent cache backing this store.
+        """
+        self.disk_cache = disk_cache
+        self._documents: Dict[str, Document] = {}
+        self._lock = threading.Lock()
+
+    def get(self, url: str) -> Optional[Document]:
+        key = normalize_url(url)
+        with self._lock:
+            document = self._documents.get(key)
+        if document is None and self.disk_cache is not None:
+            document = self.disk_cache.get(key)
+            if document is not None:
+                with self._lock:
+                    self._documents[key] = document
+        return document
+
+    def put(self, url: str, text: str, final_url: str = None):
+        key = normalize_url(url)
+        document = Document(url=final_url or url, text=text)
+        with self._lock:
+            self._documents[key] = document
+        if self.disk_cache is not None:
+            try:
+                self.disk_cache.put(key, document)
+            except OSError as e:
+                print(f"Error writing document cache for {url}: {str(e)}")
+
+    async def get_async(self, url: str) -> Optional[Document]:
+        """Awaitable ``get``: a miss in memory reads the disk cache in a thread, off the event loop."""
+        with self._lock:
+            document = self._documents.get(normalize_url(url))
+        if document is not None or self.disk_cache is None:
+            return document
+        return await asyncio.to_thread(self.get, url)
+
+    async def put_async(self, url: str, text: str, final_url: str = None):
+        """Awaitable ``put``: compresses and writes to the disk cache in a thread."""
+        if self.disk_cache is None:
+            self.put(url, text, final_url=final_url)
+        else:
+            await asyncio.to_thread(self.put, url, text, final_url)
+
+    def __contains__(self, url: str) -> bool:
+        return self.get(url) is not None
+
+
+_shared_disk_cache = None
+
+
+def get_disk_document_cache() -> Optional[DiskDocumentCache]:
+    """Process-wide on-disk document cache, or None when DOCUMENT_CACHE_TTL is 0."""
+    global _shared_disk_cache
+    if DOCUMENT_CACHE_TTL <= 0:
+        return None
+    if _shared_disk_cache is None:
+        _shared_disk_cache = DiskDocumentCache()
+    return _shared_disk_cache
@@ -0,0 +1,97 @@
+import hashlib
+import os
+import random
+import re
+import struct
+from typing import List, Optional, Sequence, Tuple
+
+
+# Estimated Jaccard similarity of word shingles above which two evidences count as the same story
+EVIDENCE_DEDUP_THRESHOLD = float(os.getenv("EVIDENCE_DEDUP_THRESHOLD", "0.6"))
+SHINGLE_SIZE = 3
+NUM_PERMUTATIONS = 128
+# 32 bands of 4 rows make pairs above ~0.45 similarity likely to share a bucket
+LSH_BANDS = 32
+
+_MERSENNE_PRIME = (1 << 61) - 1
+_MAX_HASH = (1 << 32) - 1
+_rng = random.Random(1)
+_PERMUTATIONS = [
+    (_rng.randrange(1, _MERSENNE_PRIME), _rng.randrange(0, _MERSENNE_PRIME)) for _ in range(NUM_PERMUTATIONS)
+]
+_WORD = re.compile(r"\w+")
+
+
+def _hash(shingle: str) -> int:
+    return struct.unpack("<I", hashlib.blake2b(shingle.encode("utf-8"), digest_size=4).digest())[0]
+
+
+def shingles(text: str, size: int = SHINGLE_SIZE) -> set:
+    """Hashes of the overlapping ``size``-word runs of ``text``, ignoring case and punctuation."""
+    words = _WORD.findall(text.casefold())
+    if len(words) < size:
+        return {_hash(" ".join(words))} if words else set()
+    return {_hash(" ".join(words[i : i + size])) for i in range(len(words) - size + 1)}
+
+
+def minhash(shingle_set: set) -> Optional[Tuple[int, ...]]:
+    """MinHash signature of a shingle set, or None for an empty set."""
+    if not shingle_set:
+        return None
+    return tuple(
+        min(((a * s + b) % _MERSENNE_PRIME) & _MAX_HASH for s in shingle_set) for a, b in _PERMUTATIONS
+    )
+
+
+def similarity(sig_a: Tuple[int, ...], sig_b: Tuple[int, ...]) -> float:
+    """Estimated Jaccard similarity of the sets behind two signatures."""
+    return sum(x == y for x, y in zip(sig_a, sig_b)) / len(sig_a)
+
+
+def dedup_evidence(
+    evidences: Sequence[str], sources: Sequence[str], threshold: float = EVIDENCE_DEDUP_THRESHOLD
+) -> Tuple[List[str], List[List[str]]]:
+    """Collapse near-duplicate evidences, such as one wire story syndicated under several URLs.
+
+    Candidate pairs are found by locality-sensitive hashing of MinHash signatures and
+    merged when their estimated similarity reaches ``threshold``. The longest text of
+    each group is kept.
+
+    Args:
+        evidences (list[str]): evidence texts, e.g. article summaries.
+        sources (list[str]): the source URL of each evidence.
+        threshold (float, optional): similarity at which two evidences are merged.
+
+    Returns:
+        tuple: the distinct evidence texts, and for each the source URLs of every evidence merged into it.
+    """
+    signatures = [minhash(shingles(text)) for text in evidences]
+    parent = list(range(len(evidences)))
+
+    def find(i):
+        while parent[i] != i:
+            parent[i] = parent[parent[i]]
+            i = parent[i]
+        return i
+
+    rows = NUM_PERMUTATIONS // LSH_BANDS
+    buckets = {}
+    for i, signature in enumerate(signatures):
+        if signature is None:
+            continue
+        for band in range(LSH_BANDS):
+            key = (band, signature[band * rows : (band + 1) * rows])
+            for j in buckets.setdefault(key, []):
+                if find(i) != find(j) and similarity(signature, signatures[j]) >= threshold:
+                    parent[find(i)] = find(j)
+            buckets[key].append(i)
+
+    groups = {}
+    for i in range(len(evidences)):
+        groups.setdefault(find(i), []).append(i)
+    # Groups keep the position of their first member
+    texts, grouped_sources = [], []
+    for members in sorted(groups.values(), key=lambda members: members[0]):
+        texts.append(max((evidences[i] for i in members), key=len))
+        grouped_sources.append(list(dict.fromkeys(sources[i] for i in members)))
+    return texts, grouped_sources
@@ -0,0 +1,140 @@
+import asyncio
+import os
+from typing import Awaitable, Callable, Dict, List, Optional
+from urllib.parse import urlparse
+
+from .local_index import FC_OFFLINE
+from .news_summ import get_news
+
+
+EVIDENCE_FETCH_CONCURRENCY = int(os.getenv("EVIDENCE_FETCH_CONCURRENCY", "8"))
+EVIDENCE_FETCH_PER_DOMAIN = int(os.getenv("EVIDENCE_FETCH_PER_DOMAIN", "2"))
+EVIDENCE_FETCH_TIMEOUT = float(os.getenv("EVIDENCE_FETCH_TIMEOUT", "10"))
+
+
+class EvidenceExtractor:
+    def __init__(
+        self,
+        fetch: Callable[[str, Optional[str]], Dict] = get_news,
+        max_concurrency: int = EVIDENCE_FETCH_CONCURRENCY,
+        per_domain: int = EVIDENCE_FETCH_PER_DOMAIN,
+        timeout: float = EVIDENCE_FETCH_TIMEOUT,
+    ):
+        """Extract evidence articles concurrently with bounded fan-out.
+
+        Args:
+            fetch (callable): blocking article fetcher ``fetch(url, html)`` returning a get_news style dict.
+            max_concurrency (int): maximum number of articles extracted at once, across all requests.
+            per_domain (int): maximum number of articles extracted at once from the same domain.
+            timeout (float): seconds to wait for a single article before skipping it. A skipped
+                article keeps its slots until its fetch thread finishes, so the bounds hold.
+        """
+        self.fetch = fetch
+        self.max_concurrency = max_concurrency
+        self.per_domain = per_domain
+        self.timeout = timeout
+        # Semaphores are created lazily so they bind to the server's event loop
+        self._slots = None
+        # domain -> [semaphore, fetches holding or waiting for it], dropped once unused
+        self._domain_slots: Dict[str, list] = {}
+
+    def _ensure_slots(self):
+        if self._slots is None:
+            self._slots = asyncio.Semaphore(self.max_concurrency)
+
+    async def _acquire(self, domain: str) -> asyncio.Semaphore:
+        entry = self._domain_slots.setdefault(domain, [asyncio.Semaphore(self.per_domain), 0])
+        entry[1] += 1
+        try:
+            await entry[0].acquire()
+        except BaseException:
+            self._forget(domain, entry)
+            raise
+        try:
+            await self._slots.acquire()
+        except BaseException:
+            entry[0].release()
+            self._forget(domain, entry)
+            raise
+        return entry
+
+    def _release(self, domain: str, entry: list, fetch: asyncio.Future):
+        self._slots.release()
+        entry[0].release()
+        self._forget(domain, entry)
+        if not fetch.cancelled():
+            # Retrieved so that a fetch failing after its timeout is not reported as unhandled
+            fetch.exception()
+
+    def _forget(self, domain: str, entry: list):
+        entry[1] -= 1
+        if entry[1] == 0 and self._domain_slots.get(domain) is entry:
+            del self._domain_slots[domain]
+
+    def _fetch(self, url: str, document_store) -> Dict:
+        html = None
+        if document_store is not None:
+            document = document_store.get(url)
+            html = document.text if document is not None else None
+        if html is None and FC_OFFLINE:
+            return {"status": "error", "message": "Not cached and running offline"}
+        return self.fetch(url, html)
+
+    async def _extract_one(self, url: str, document_store=None, on_result=None) -> Optional[Dict]:
+        if not url.startswith(("http://", "https://")):
+            # e.g. "Google Answer Box" evidences have no page behind them
+            return None
+        domain = urlparse(url).netloc
+        entry = await self._acquire(domain)
+        # The thread cannot be stopped, so its slots are released when it finishes rather than on timeout
+        fetch = asyncio.ensure_future(asyncio.to_thread(self._fetch, url, document_store))
+        fetch.add_done_callback(lambda fetch: self._release(domain, entry, fetch))
+        try:
+            article = await asyncio.wait_for(asyncio.shield(fetch), timeout=self.timeout)
+        except asyncio.TimeoutError:
+            print(f"Timed out extracting evidence article: {url}")
+            return None
+        except Exception as e:
+            print(f"Error extracting evidence article {url}: {str(e)}")
+            return None
+        if article.get("status") != "success":
+            return None
+        if on_result is not None:
+            await on_result(url, article)
+        return article
+
+    async def extract(
+        self,
+        urls: List[str],
+        document_store=None,
+        on_result: Callable[[str, Dict], Awaitable[None]] = None,
+        shared: Dict[str, asyncio.Future] = None,
+    ) -> List[Optional[Dict]]:
+        """Extract the articles behind the given URLs.
+
+        Args:
+            urls (list[str]): evidence URLs, duplicates are only fetched once.
+            document_store (DocumentStore, optional): already downloaded pages to parse instead of refetching.
+            on_result (callable, optional): awaited with ``(url, article)`` as soon as each article is extracted.
+            shared (dict, optional): url -> extraction task map shared between calls, so a URL cited by
+                several fact-checks in a batch is only extracted once.
+
+        Returns:
+            list[dict | None]: the extracted article for each URL in input order, None where extraction failed.
+        """
+        self._ensure_slots()
+        unique_urls = list(dict.fromkeys(urls))
+        tasks = []
+        for url in unique_urls:
+            task = shared.get(url) if shared is not None else None
+            if task is None:
+                task = asyncio.ensure_future(self._extract_one(url, document_store, on_result))
+                if shared is not None:
+                    shared[url] = task
+            tasks.append(task)
+        if shared is not None:
+            # Shared tasks belong to the caller of the batch, one item being cancelled must not cancel them
+            tasks = [asyncio.shield(task) for task in tasks]
+        articles = await asyncio.gather(*tasks)
+        by_url = dict(zip(unique_urls, articles))
+        return [by_url[url] for url in urls]
@@ -0,0 +1,143 @@
+import math
+import os
+import re
+from collections import Counter
+from typing import Dict, List, Sequence
+
+try:
+    import tiktoken
+except ImportError:
+    tiktoken = None
+
+
+# Tokens of evidence sent to the report prompt
+EVIDENCE_TOKEN_BUDGET = int(os.getenv("EVIDENCE_TOKEN_BUDGET", "3000"))
+BM25_K1 = 1.5
+BM25_B = 0.75
+
+_WORD = re.compile(r"\w+")
+_PIECE = re.compile(r"\w+|[^\w\s]")
+# Gemini's own tokenizer is only reachable through the count_tokens API call, so tokens are
+# counted with tiktoken's cl100k_base as an approximation; the budget leaves room for the difference
+TOKEN_ENCODING = "cl100k_base"
+
+_encoding = None
+_encoding_failed = False
+
+
+def _get_encoding():
+    global _encoding, _encoding_failed
+    if _encoding is None and tiktoken is not None and not _encoding_failed:
+        try:
+            # Reads the encoding file from TIKTOKEN_CACHE_DIR, filled at image build time
+            _encoding = tiktoken.get_encoding(TOKEN_ENCODING)
+        except Exception as e:
+            _encoding_failed = True
+            print(f"Error loading tiktoken encoding, estimating token counts instead: {str(e)}")
+    return _encoding
+
+
+def _piece_tokens(piece: str) -> int:
+    # Subword tokenizers average roughly four characters of English per token
+    return max(1, math.ceil(len(piece) / 4))
+
+
+def count_tokens(text: str) -> int:
+    """Token count of ``text`` in TOKEN_ENCODING, a stand-in for Gemini's tokenizer.
+
+    Falls back to a local estimate when tiktoken or its encoding file is unavailable.
+    """
+    encoding = _get_encoding()
+    if encoding is not None:
+        return len(encoding.encode(text, disallowed_special=()))
+    return sum(_piece_tokens(piece) for piece in _PIECE.findall(text))
+
+
+def truncate_to_tokens(text: str, max_tokens: int) -> str:
+    """The longest prefix of ``text`` that fits in ``max_tokens`` tokens."""
+    encoding = _get_encoding()
+    if encoding is not None:
+        tokens = encoding.encode(text, disallowed_special=())
+        return text if len(tokens) <= max_tokens else encoding.decode(tokens[:max_tokens])
+    used = 0
+    for match in _PIECE.finditer(text):
+        used += _piece_tokens(match.group())
+        if used > max_tokens:
+            return text[: match.start()].rstrip()
+    return text
+
+
+def _terms(text: str) -> List[str]:
+    return _WORD.findall(text.casefold())
+
+
+def bm25_scores(query: str, passages: Sequence[str], k1: float = BM25_K1, b: float = BM25_B) -> List[float]:
+    """Okapi BM25 score of every passage for ``query``, with the passages themselves as the corpus."""
+    docs = [Counter(_terms(passage)) for passage in passages]
+    if not docs:
+        return []
+    lengths = [sum(doc.values()) for doc in docs]
+    avg_length = sum(lengths) / len(docs) or 1
+    document_frequency = Counter(term for doc in docs for term in doc)
+    query_terms = Counter(_terms(query))
+    idf = {
+        term: math.log(1 + (len(docs) - document_frequency[term] + 0.5) / (document_frequency[term] + 0.5))
+        for term in query_terms
+    }
+    scores = []
+    for doc, length in zip(docs, lengths):
+        score = 0.0
+        for term, query_count in query_terms.items():
+            tf = doc.get(term, 0)
+            if tf:
+                score += query_count * idf[term] * tf * (k1 + 1) / (tf + k1 * (1 - b + b * length / avg_length))
+        scores.append(score)
+    return scores
+
+
+def rank_evidence(
+    claim: str,
+    questions: Sequence[str],
+    evidences: Sequence[str],
+    sources: Sequence[List[str]],
+    token_budget: int = EVIDENCE_TOKEN_BUDGET,
+) -> List[Dict]:
+    """Score evidence passages against the claim and its verification questions and pack the best into a budget.
+
+    Passages are taken in order of their BM25 score while they fit in ``token_budget``;
+    if not even the best one fits, it is truncated to the budget.
+
+    Args:
+        claim (str): the text being fact-checked.
+        questions (list[str]): the verification questions generated for it.
+        evidences (list[str]): evidence passages.
+        sources (list[list[str]]): the source URLs of each passage.
+        token_budget (int, optional): tokens of evidence allowed in the prompt. Defaults to EVIDENCE_TOKEN_BUDGET.
+
+    Returns:
+        list[dict]: one entry per passage, best first, with its ``text``, ``sources``, ``score``,
+        ``tokens`` and whether it was ``included`` in the budget.
+    """
+    query = " ".join([claim, *questions])
+    scores = bm25_scores(query, evidences)
+    ranked = sorted(range(len(evidences)), key=lambda i: scores[i], reverse=True)
+    remaining = token_budget
+    passages = []
+    for i in ranked:
+        text = evidences[i]
+        tokens = count_tokens(text)
+        included = tokens <= remaining
+        if not included and remaining == token_budget and token_budget > 0:
+            text = truncate_to_tokens(text, token_budget)
+            tokens = count_tokens(text)
+            included = True
+        if included:
+            remaining -= tokens
+        passages.append({
+            "text": text,
+            "sources": list(sources[i]),
+            "score": round(scores[i], 4),
+            "tokens": tokens,
+            "included": included,
+        })
+    return passages
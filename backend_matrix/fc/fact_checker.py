@@ -2,24 +2,33 @@ from groq import Groq
 import os
 import dotenv
 import google.generativeai as genai
-from typing import List, Dict
+from typing import Any, AsyncIterator, Awaitable, Callable, List, Dict, Tuple
 import json
 from dataclasses import dataclass
 from datetime import datetime
 import requests
 from urllib.parse import quote
 from .serper_search import SerperEvidenceRetriever
+from .evidence_extractor import EvidenceExtractor
+from .document_store import DocumentStore, get_disk_document_cache
+from .report_cache import ReportCache, report_key
+from .bounded_chat import BoundedChat
+from .source_credibility import DomainCredibilityStore, domain_key
+from .stage_graph import StageGraph
+from .evidence_dedup import dedup_evidence
+from .evidence_ranker import rank_evidence
+from .local_index import get_local_index
 from google.ai.generativelanguage_v1beta.types import content
 import time
-from routes.news_summ import get_news
-from urllib.parse import urlparse
-import threading
-import concurrent.futures
+import asyncio
 
 dotenv.load_dotenv()
 
 genai.configure(api_key=os.getenv("GEMINI_API_KEY"))
 
+# Maximum number of batch items talking to Gemini at the same time
+BATCH_LLM_CONCURRENCY = int(os.getenv("BATCH_LLM_CONCURRENCY", "10"))
+
 @dataclass
 class Claim:
     statement: str
@@ -149,30 +158,55 @@ class FactChecker:
         "response_mime_type": "application/json",
         }
 
+        generation_config_questions = {
+        "temperature": 1,
+        "top_p": 0.95,
+        "top_k": 40,
+        "max_output_tokens": 8192,
+        "response_schema": content.Schema(
+            type = content.Type.OBJECT,
+            enum = [],
+            required = ["questions"],
+            properties = {
+            "questions": content.Schema(
+                type = content.Type.ARRAY,
+                items = content.Schema(
+                type = content.Type.STRING,
+                ),
+            ),
+            },
+        ),
+        "response_mime_type": "application/json",
+        }
 
         #############################################################
         self.client = Groq(api_key=groq_api_key)
         self.search_client = SerperEvidenceRetriever(api_key=serper_api_key)
+        self.evidence_extractor = EvidenceExtractor()
+        self.report_cache = ReportCache()
         
         #############################################################
         self.gemini_client = genai.GenerativeModel(
             model_name="gemini-2.0-flash",
             generation_config=generation_config,
         )
-        self.gemini_chat = self.gemini_client.start_chat(
-            history=[]
-        )
         
         #############################################################
         self.source_correction = genai.GenerativeModel(
             model_name="gemini-2.0-flash",
             generation_config=generation_config_sources,
         )
-        self.gemini_chat_sources = self.source_correction.start_chat(
-            history=[]
+        # Stateless unless GEMINI_HISTORY_TURNS asks for a bounded history, kept per report
+        self.gemini_chat_sources = BoundedChat(self.source_correction)
+        self.source_credibility_store = DomainCredibilityStore(self._rate_domains)
+        
+        #############################################################
+        self.questions_model = genai.GenerativeModel(
+            model_name="gemini-2.0-flash",
+            generation_config=generation_config_questions,
         )
     
-    def generate_verification_questions(self, claim: str) -> List[str]:
+    async def generate_verification_questions(self, claim: str) -> List[str]:
         # prompt = {
         #     "role": "user",
         #     "content": f"Generate specific questions to verify this claim. Make a maximum of 5 questions for the claim. Return as JSON array:\n\n{claim}"
@@ -187,48 +221,17 @@ class FactChecker:
         
         gemini_questions_prompt = f"Generate specific questions to verify this claim. Make a maximum of 3 questions for the claim. Return as JSON array:\n\n{claim}"
 
-        generation_config_questions = {
-        "temperature": 1,
-        "top_p": 0.95,
-        "top_k": 40,
-        "max_output_tokens": 8192,
-        "response_schema": content.Schema(
-            type = content.Type.OBJECT,
-            enum = [],
-            required = ["questions"],
-            properties = {
-            "questions": content.Schema(
-                type = content.Type.ARRAY,
-                items = content.Schema(
-                type = content.Type.STRING,
-                ),
-            ),
-            },
-        ),
-        "response_mime_type": "application/json",
-        }
-
-        model_questions = genai.GenerativeModel(
-            model_name="gemini-2.0-flash",
-            generation_config=generation_config_questions,
-        )
-
-        chat_session_questions = model_questions.start_chat(
-        history=[
-        ]
-        )
-
-        response = chat_session_questions.send_message(gemini_questions_prompt)
+        response = await self.questions_model.generate_content_async(gemini_questions_prompt)
 
 
         return json.loads(response.text)
 
-    def search_evidence(self, query: str) -> List[Dict]:
-        return self.search_client.retrieve_evidence(query)
+    async def search_evidence(self, query: str) -> List[Dict]:
+        return await self.search_client.retrieve_evidence(query)
 
-    def analyze_source_credibility(self, sources):
+    async def analyze_source_credibility(self, sources):
         """
-        Analyze the credibility of news sources using Gemini
+        Analyze the credibility of news sources, asking Gemini only about unrated domains
         
         Args:
             sources: List of source URLs to analyze
@@ -238,10 +241,31 @@ class FactChecker:
         """
         if not sources:
             return []
-        
+        return self._join_credibility(sources, await self._rate_source_domains(sources))
+
+    async def _rate_source_domains(self, urls) -> Dict[str, Dict]:
+        """Rate every distinct domain among ``urls``, returning ``{domain: rating}``"""
         # Extract domain names from URLs for better analysis
-        domains = [urlparse(source).netloc for source in sources]
-        
+        domains = list(dict.fromkeys(domain_key(url) for url in urls if url.startswith(("http://", "https://"))))
+        if not domains:
+            return {}
+        try:
+            return await self.source_credibility_store.lookup(domains)
+        except Exception as e:
+            print(f"Error parsing source credibility analysis: {str(e)}")
+            return {}
+
+    @staticmethod
+    def _join_credibility(sources, domain_ratings) -> List[Dict]:
+        """Map the domain ratings back to the source URLs"""
+        return [
+            {**domain_ratings[domain_key(url)], 'url': url}
+            for url in sources
+            if domain_key(url) in domain_ratings
+        ]
+
+    async def _rate_domains(self, domains):
+        """Rate the given domains with a single Gemini call, one object per domain"""
         # Create a prompt that asks Gemini to evaluate the sources
         source_analysis_prompt = f"""
         Analyze the credibility of these news sources:
@@ -258,30 +282,15 @@ class FactChecker:
         - Citation score (1-100)
         - Peer recognition (1-100)
         
-        Return the analysis as a structured JSON array with one object per source.
+        Return the analysis as a structured JSON array with one object per source, in the same order.
         """
         
         # Use the gemini_chat_sources which has the appropriate schema configuration
-        response = self.gemini_chat_sources.send_message(source_analysis_prompt)
-        
-        try:
-            source_ratings = json.loads(response.text)
-            
-            # Map the domain analysis back to the original URLs
-            result = []
-            for i, url in enumerate(sources):
-                if i < len(source_ratings):
-                    rating = source_ratings[i]
-                    rating['url'] = url
-                    result.append(rating)
-            
-            return result
-        except Exception as e:
-            print(f"Error parsing source credibility analysis: {str(e)}")
-            return []
+        response = await self.gemini_chat_sources.send_message_async(source_analysis_prompt)
+        return json.loads(response.text)
 
-    def _generate_enhanced_report(self, news_summ, evidences, result_dict):
-        """Helper method to generate enhanced report in a separate thread"""
+    async def _generate_enhanced_report(self, news_summ, evidences):
+        """Helper method to generate the enhanced report concurrently with source analysis"""
         report_prompt = f"""Generate a comprehensive fact-check analysis report for this news claim and supporting evidence. Structure your analysis according to these sections:
 
         1. Overall Analysis:
@@ -303,15 +312,190 @@ class FactChecker:
         Please provide numerical scores where applicable and cite specific evidence examples to support your analysis.
         """
                     
-        enhanced_report = self.gemini_client.generate_content(report_prompt)
-        result_dict['detailed_analysis'] = json.loads(enhanced_report.text)
+        enhanced_report = await self.gemini_client.generate_content_async(report_prompt)
+        return json.loads(enhanced_report.text)
 
-    def _analyze_sources_credibility(self, sources, result_dict):
-        """Helper method to analyze source credibility in a separate thread"""
-        source_credibility = self.analyze_source_credibility(sources[:5])  # Analyze top 5 sources
-        result_dict['source_credibility'] = source_credibility
+    async def _analyze_sources_credibility(self, sources):
+        """Helper method to analyze source credibility concurrently with the report"""
+        # Any chat history stays within this report
+        with self.gemini_chat_sources.session():
+            return await self.analyze_source_credibility(sources[:5])  # Analyze top 5 sources
+
+    @staticmethod
+    async def _emit_when_done(coro, stage, emit, default):
+        """Await ``coro`` and publish its result as ``stage``; a failure yields ``default`` instead"""
+        try:
+            result = await coro
+        except Exception as e:
+            print(f"Error in {stage} stage: {str(e)}")
+            result = default
+        if emit is not None:
+            await emit(stage, result)
+        return result
     
-    def generate_report(self, news_summ: str) -> Dict:
+    async def generate_report(self, news_summ: str, use_cache: bool = True) -> Dict:
+        """Fact-check ``news_summ``, serving recently verified text from the report cache"""
+        if not use_cache:
+            return await self._generate_report_uncached(news_summ)
+        return await self.report_cache.get_or_compute(news_summ, lambda: self._generate_report_uncached(news_summ))
+
+    async def generate_report_stream(self, news_summ: str) -> AsyncIterator[Tuple[str, Any]]:
+        """Fact-check ``news_summ`` and yield ``(stage, data)`` pairs as each stage completes.
+
+        Stages are ``questions``, ``evidence_urls``, one ``summary`` per extracted article,
+        ``source_credibility`` and ``detailed_analysis``, always followed by the full ``report``.
+        A cached report, or one already being computed for another request, is yielded
+        directly once ready.
+        """
+        if self.report_cache.in_flight(news_summ) is not None or await self.report_cache.get(news_summ) is not None:
+            yield "report", await self.report_cache.get_or_compute(
+                news_summ, lambda: self._generate_report_uncached(news_summ)
+            )
+            return
+
+        queue = asyncio.Queue()
+
+        async def emit(stage, data):
+            await queue.put((stage, data))
+
+        # Registered with the report cache, so requests for the same text join this computation
+        task = self.report_cache.start(news_summ, lambda: self._generate_report_uncached(news_summ, emit=emit))
+        task.add_done_callback(lambda _: queue.put_nowait(None))
+        try:
+            while (item := await queue.get()) is not None:
+                yield item
+            report = await task
+        finally:
+            # The client went away before the report was ready and no other request is waiting for it
+            if not task.done() and not self.report_cache.waiting(news_summ):
+                task.cancel()
+        yield "report", {**report, "original_text": news_summ}
+
+    async def generate_reports(self, texts: List[str]) -> AsyncIterator[Tuple[int, Dict]]:
+        """Fact-check many texts at once and yield ``(index, report)`` as each one completes.
+
+        Items go through the report cache like single reports: cached texts are served from it,
+        texts another request is already checking join that computation, and the others are
+        registered with it so duplicates in this or later requests share one computation.
+        Verification questions of the new items are deduplicated and sent to Serper together
+        (in 100-query payloads), and the crawled pages and extracted articles are shared
+        between items citing the same URLs. Items that fail, including when the shared search
+        fails, yield a report with an ``error`` key. Every other report has ``timed_out`` set
+        when some of its evidence missed the retrieval deadline and fell back to the search
+        snippet. Closing the generator cancels the work no other request is waiting for.
+        """
+        pending: Dict[str, List[int]] = {}
+        for i, text in enumerate(texts):
+            key = report_key(text)
+            if key not in pending and self.report_cache.in_flight(text) is None:
+                cached = await self.report_cache.get(text)
+                if cached is not None:
+                    yield i, self._batch_item(cached, text)
+                    continue
+            pending.setdefault(key, []).append(i)
+        if not pending:
+            return
+
+        llm_slots = asyncio.Semaphore(BATCH_LLM_CONCURRENCY)
+        item_texts = {key: texts[indices[0]] for key, indices in pending.items()}
+        # Texts another request is already checking are joined, not searched again
+        joined = {key for key, text in item_texts.items() if self.report_cache.in_flight(text) is not None}
+        document_store = DocumentStore(disk_cache=get_disk_document_cache())
+        shared_articles = {}
+
+        async def questions_for(text):
+            async with llm_slots:
+                return (await self.generate_verification_questions(text))["questions"]
+
+        async def gather_evidence():
+            new_keys = [key for key in item_texts if key not in joined]
+            questions = dict(zip(
+                new_keys,
+                await asyncio.gather(*(questions_for(item_texts[key]) for key in new_keys), return_exceptions=True),
+            ))
+            # One Serper round for every distinct question in the batch
+            unique_queries = list(dict.fromkeys(
+                q for item_questions in questions.values() if not isinstance(item_questions, Exception) for q in item_questions
+            ))
+            query_evidence = {}
+            search_error = None
+            if unique_queries:
+                try:
+                    query_evidence = await self.search_client.retrieve_evidence(
+                        claim_queries_dict={q: [q] for q in unique_queries}, document_store=document_store
+                    )
+                except Exception as e:
+                    search_error = e
+            return questions, query_evidence, search_error
+
+        evidence = asyncio.ensure_future(gather_evidence())
+
+        async def report_for(key):
+            # Shielded, so cancelling one item does not cancel the search the others share
+            questions, query_evidence, search_error = await asyncio.shield(evidence)
+            if isinstance(questions[key], Exception):
+                raise questions[key]
+            if search_error is not None:
+                raise search_error
+            evidence_urls, fallbacks, degraded = self._evidence_sources(
+                [evidence_item for q in questions[key] for evidence_item in query_evidence.get(q, [])]
+            )
+            evidences, sources = await self._extract_evidence(
+                evidence_urls, document_store, shared_articles=shared_articles, snippet_fallbacks=fallbacks
+            )
+            async with llm_slots:
+                return await self._build_report(
+                    item_texts[key],
+                    evidences,
+                    sources,
+                    questions=questions[key],
+                    degraded_sources=[url for url in sources if url in degraded],
+                )
+
+        async def outcome(key, report):
+            try:
+                return key, await report
+            except Exception as e:
+                print(f"Error in batch fact check: {str(e)}")
+                return key, {"timestamp": datetime.now().isoformat(), "error": str(e)}
+
+        # Registered with the report cache, which stores each report once it is done
+        computations = {}
+        waits = []
+        for key, text in item_texts.items():
+            if key in joined:
+                report = self.report_cache.get_or_compute(text, lambda text=text: self._generate_report_uncached(text))
+            else:
+                computations[key] = self.report_cache.start(text, lambda key=key: report_for(key))
+                report = asyncio.shield(computations[key])
+            waits.append(asyncio.ensure_future(outcome(key, report)))
+        try:
+            for next_done in asyncio.as_completed(waits):
+                key, report = await next_done
+                for i in pending[key]:
+                    yield i, self._batch_item(report, texts[i])
+        finally:
+            # The client went away before every item was ready; items other requests joined keep running
+            for task in waits:
+                task.cancel()
+            running = [task for task in computations.values() if not task.done()]
+            for key, task in computations.items():
+                if not task.done() and not self.report_cache.waiting(item_texts[key]):
+                    task.cancel()
+                    running.remove(task)
+            if not running:
+                for task in [evidence, *shared_articles.values()]:
+                    if not task.done():
+                        task.cancel()
+
+    @staticmethod
+    def _batch_item(report: Dict, text: str) -> Dict:
+        """A report as generate_reports yields it, flagged when its evidence was cut off by the deadline"""
+        if "error" in report:
+            return {**report, "original_text": text}
+        return {**report, "original_text": text, "timed_out": bool(report.get("degraded_sources"))}
+
+    async def _generate_report_uncached(self, news_summ: str, emit: Callable[[str, Any], Awaitable[None]] = None) -> Dict:
         ### FUTURE PROSPECT ###
         # # Source credibility analysis
         # source_ratings = {}
@@ -334,44 +518,185 @@ class FactChecker:
         # time.sleep(60)
         ### FUTURE PROSPECT ###
         
-        verif_ques = self.generate_verification_questions(news_summ)["questions"]
-        
-        # retrieve evidences for each question from the search client
-        claim_queries_dict = {news_summ: [q for q in verif_ques]}
-        
-        evidence_dict = self.search_client.retrieve_evidence(claim_queries_dict=claim_queries_dict)
-        
-        # Collect evidence for each question
+        document_store = DocumentStore(disk_cache=get_disk_document_cache())
+        graph = self._report_graph(news_summ, document_store, emit)
+        results = await graph.run()
+        _, sources = results["extraction"]
+        _, _, degraded = results["evidence"]
+        return self._assemble_report(
+            news_summ,
+            results["analysis"],
+            sources,
+            results["source_credibility"],
+            stage_timings=graph.timings,
+            degraded_sources=[url for url in sources if url in degraded],
+            evidence_ranking=results["ranking"],
+        )
+
+    def _report_graph(self, news_summ: str, document_store, emit=None) -> StageGraph:
+        """The stages of one report, wired so each starts as soon as its inputs are ready"""
+
+        async def questions_stage():
+            verif_ques = (await self.generate_verification_questions(news_summ))["questions"]
+            if emit is not None:
+                await emit("questions", verif_ques)
+            return verif_ques
+
+        async def search_stage(questions):
+            # A failed search fails the report, which is then not cached
+            return await self.search_client.search_queries(questions)
+
+        async def evidence_stage(questions, search):
+            # Pages crawled for snippet extension are reused by the article extraction below
+            evidence_dict = await self.search_client.retrieve_evidence(
+                claim_queries_dict={news_summ: questions}, document_store=document_store, serper_responses=search
+            )
+            evidence = self._evidence_sources(
+                [evidence_item for evidence in evidence_dict.values() for evidence_item in evidence]
+            )
+            if emit is not None:
+                await emit("evidence_urls", list(dict.fromkeys(evidence[0])))
+            return evidence
+
+        async def credibility_stage(evidence):
+            # Rates the domains of every evidence URL while the articles are extracted
+            evidence_urls, _, _ = evidence
+            with self.gemini_chat_sources.session():
+                return await self._rate_source_domains(evidence_urls)
+
+        async def source_credibility_stage(credibility, extraction):
+            # Only the sources shown in the report are listed
+            _, sources = extraction
+            source_credibility = self._join_credibility(sources[:5], credibility)
+            if emit is not None:
+                await emit("source_credibility", source_credibility)
+            return source_credibility
+
+        async def extraction_stage(evidence):
+            evidence_urls, fallbacks, _ = evidence
+            # Summaries are published to the stream as soon as each article is parsed
+            return await self._extract_evidence(evidence_urls, document_store, emit=emit, snippet_fallbacks=fallbacks)
+
+        async def ranking_stage(questions, extraction):
+            return self._rank_evidence(news_summ, questions, *extraction)
+
+        async def analysis_stage(ranking):
+            evidences = [passage["text"] for passage in ranking if passage["included"]]
+            return await self._emit_when_done(
+                self._generate_enhanced_report(news_summ, evidences), "detailed_analysis", emit, {}
+            )
+
+        return (
+            StageGraph()
+            .add("questions", questions_stage)
+            .add("search", search_stage, deps=["questions"])
+            .add("evidence", evidence_stage, deps=["questions", "search"])
+            .add("credibility", credibility_stage, deps=["evidence"])
+            .add("extraction", extraction_stage, deps=["evidence"])
+            .add("source_credibility", source_credibility_stage, deps=["credibility", "extraction"])
+            .add("ranking", ranking_stage, deps=["questions", "extraction"])
+            .add("analysis", analysis_stage, deps=["ranking"])
+        )
+
+    @staticmethod
+    def _rank_evidence(news_summ, questions, evidences, sources):
+        """Merge near-duplicate evidence and rank it against the claim within the prompt's token budget"""
+        # Syndicated copies of a story would otherwise be sent to Gemini several times
+        evidences, grouped_sources = dedup_evidence(evidences, sources)
+        return rank_evidence(news_summ, questions, evidences, grouped_sources)
+
+    @staticmethod
+    def _evidence_sources(evidence_items):
+        """Split retrieved evidence into its URLs and the texts to use instead of extracting an article.
+
+        Returns the evidence URLs, ``{url: text}`` for evidence that is not fetched again (pages that
+        missed the retrieval deadline and passages from the local index), and the degraded URLs.
+        """
+        evidence_urls = [evidence_item['url'] for evidence_item in evidence_items]
+        fallbacks = {
+            evidence_item['url']: evidence_item['text']
+            for evidence_item in evidence_items
+            if evidence_item.get('degraded') or evidence_item.get('local')
+        }
+        degraded = {evidence_item['url'] for evidence_item in evidence_items if evidence_item.get('degraded')}
+        return evidence_urls, fallbacks, degraded
+
+    async def _extract_evidence(self, evidence_urls, document_store, emit=None, shared_articles=None, snippet_fallbacks=None):
+        """Extract the evidence articles and return the summaries with their source URLs
+
+        URLs in ``snippet_fallbacks`` are not fetched again; their search snippet is used as the evidence.
+        """
+        on_article = None
+        if emit is not None:
+            async def on_article(url, article):
+                await emit("summary", {"url": url, "title": article.get("title", ""), "summary": article["summary"]})
+
+        snippet_fallbacks = snippet_fallbacks or {}
+        fetch_urls = [url for url in evidence_urls if url not in snippet_fallbacks]
+        extracted = await self.evidence_extractor.extract(
+            fetch_urls, document_store=document_store, on_result=on_article, shared=shared_articles
+        )
+        await self._index_articles(extracted)
+        ev_articles = iter(extracted)
         evidences = []
         sources = []
-        for claim, evidence in evidence_dict.items():
-            for evidence_item in evidence:
-                ev_news = get_news(evidence_item['url'])
-                if (ev_news["status"] == "success"):
-                    evidences.append(ev_news["summary"])
-                    sources.append(evidence_item['url'])
-        
-        # Use a dictionary to store results from threads
-        thread_results = {}
-        
-        # Create threads for parallel execution
-        report_thread = threading.Thread(
-            target=self._generate_enhanced_report,
-            args=(news_summ, evidences, thread_results)
+        for url in evidence_urls:
+            if url in snippet_fallbacks:
+                evidences.append(snippet_fallbacks[url])
+                sources.append(url)
+                continue
+            ev_news = next(ev_articles)
+            if ev_news is not None:
+                evidences.append(ev_news["summary"])
+                sources.append(url)
+        return evidences, sources
+
+    @staticmethod
+    async def _index_articles(articles):
+        """Add extracted evidence articles to the local evidence index so later searches can skip the web"""
+        local_index = get_local_index()
+        if local_index is None:
+            return
+        try:
+            await asyncio.to_thread(local_index.add_articles, [article for article in articles if article is not None])
+        except Exception as e:
+            print(f"Error indexing evidence articles: {str(e)}")
+
+    async def _build_report(
+        self, news_summ, evidences, sources, questions=(), emit=None, degraded_sources=None
+    ) -> Dict:
+        """Run the enhanced report and the source analysis and assemble the final report"""
+        # Evidence is merged and trimmed for the prompt only, the source analysis still sees every source
+        ranking = self._rank_evidence(news_summ, questions, evidences, sources)
+        prompt_evidences = [passage["text"] for passage in ranking if passage["included"]]
+        # Run the report and the source analysis concurrently; a failure in one
+        # should not discard the result of the other
+        detailed_analysis, source_credibility = await asyncio.gather(
+            self._emit_when_done(
+                self._generate_enhanced_report(news_summ, prompt_evidences), "detailed_analysis", emit, {}
+            ),
+            self._emit_when_done(self._analyze_sources_credibility(sources), "source_credibility", emit, []),
         )
-        
-        source_thread = threading.Thread(
-            target=self._analyze_sources_credibility,
-            args=(sources, thread_results)
+        return self._assemble_report(
+            news_summ,
+            detailed_analysis,
+            sources,
+            source_credibility,
+            degraded_sources=degraded_sources,
+            evidence_ranking=ranking,
         )
-        
-        # Start both threads
-        report_thread.start()
-        source_thread.start()
-        
-        # Wait for both threads to complete
-        report_thread.join()
-        source_thread.join()
+
+    def _assemble_report(
+        self,
+        news_summ,
+        detailed_analysis,
+        sources,
+        source_credibility,
+        stage_timings=None,
+        degraded_sources=None,
+        evidence_ranking=None,
+    ) -> Dict:
+        """Combine the stage results into the report returned to callers"""
 
         ### FUTURE PROSPECT ###
         # Source Ratings: {json.dumps(source_ratings)}
@@ -385,13 +710,24 @@ class FactChecker:
         ### FUTURE PROSPECT ###
             
          # Return the combined results
-        return {
+        report = {
             "timestamp": datetime.now().isoformat(),
             "original_text": news_summ,
-            "detailed_analysis": thread_results.get('detailed_analysis', {}),
+            "detailed_analysis": detailed_analysis or {},
             "sources": sources[:5],
-            "source_credibility": thread_results.get('source_credibility', [])
+            "source_credibility": source_credibility or []
         }
+        if stage_timings is not None:
+            report["stage_timings"] = stage_timings
+        if degraded_sources is not None:
+            # Sources whose evidence is only the search snippet because their page was not crawled in time
+            report["degraded_sources"] = list(dict.fromkeys(degraded_sources))
+        if evidence_ranking is not None:
+            # Why each passage was or was not part of the prompt
+            report["evidence_ranking"] = [
+                {key: passage[key] for key in ("sources", "score", "tokens", "included")} for passage in evidence_ranking
+            ]
+        return report
             ### FUTURE PROSPECT ###
             # "correction_sources": correction_sources
             ### FUTURE PROSPECT ###
\ No newline at end of file
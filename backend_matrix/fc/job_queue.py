@@ -0,0 +1,220 @@
+import asyncio
+import itertools
+import json
+import os
+import sqlite3
+import threading
+import time
+import uuid
+from typing import Any, Awaitable, Callable, Dict, Optional
+
+from .kv_store import CACHE_DIR
+
+
+JOB_WORKERS = int(os.getenv("JOB_WORKERS", "2"))
+# Finished jobs are kept this long so clients can still poll their result
+JOB_RETENTION = float(os.getenv("JOB_RETENTION", str(24 * 3600)))
+# Client-supplied priorities are clamped to [-JOB_MAX_PRIORITY, JOB_MAX_PRIORITY]
+JOB_MAX_PRIORITY = int(os.getenv("JOB_MAX_PRIORITY", "10"))
+
+QUEUED = "queued"
+RUNNING = "running"
+DONE = "done"
+FAILED = "failed"
+CANCELLED = "cancelled"
+
+
+class JobQueue:
+    def __init__(
+        self,
+        workers: int = JOB_WORKERS,
+        notify: Callable[[Dict], Awaitable[None]] = None,
+        path: str = None,
+    ):
+        """Prioritized background jobs backed by a persistent job table.
+
+        Handlers are registered per job kind and run on a bounded pool of worker
+        tasks. Queued jobs survive a restart and are picked up again by ``start``.
+
+        Args:
+            workers (int): number of jobs run at the same time.
+            notify (callable, optional): awaited with the job record whenever a job finishes.
+            path (str, optional): SQLite database file. Defaults to CACHE_DIR/jobs.sqlite3.
+        """
+        if path is None:
+            os.makedirs(CACHE_DIR, exist_ok=True)
+            path = os.path.join(CACHE_DIR, "jobs.sqlite3")
+        self.workers = workers
+        self.notify = notify
+        self._handlers: Dict[str, Callable[[Dict], Awaitable[Any]]] = {}
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None, timeout=30)
+        with self._lock:
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS jobs ("
+                "id TEXT PRIMARY KEY, kind TEXT NOT NULL, status TEXT NOT NULL, priority INTEGER NOT NULL, "
+                "payload TEXT NOT NULL, result TEXT, error TEXT, created_at REAL NOT NULL, updated_at REAL NOT NULL)"
+            )
+        self._queue: Optional[asyncio.PriorityQueue] = None
+        self._sequence = itertools.count()
+        self._worker_tasks = []
+        self._running: Dict[str, asyncio.Task] = {}
+        self._notifications = set()
+
+    def register(self, kind: str, handler: Callable[[Dict], Awaitable[Any]]):
+        """Run ``handler(payload)`` for jobs of ``kind``; its JSON-serializable return value is the job result."""
+        self._handlers[kind] = handler
+
+    async def start(self):
+        """Start the workers and requeue jobs left unfinished by a previous process."""
+        self._queue = asyncio.PriorityQueue()
+        with self._lock:
+            self._conn.execute(
+                "DELETE FROM jobs WHERE status IN (?, ?, ?) AND updated_at < ?",
+                (DONE, FAILED, CANCELLED, time.time() - JOB_RETENTION),
+            )
+            self._conn.execute("UPDATE jobs SET status = ? WHERE status = ?", (QUEUED, RUNNING))
+            rows = self._conn.execute(
+                "SELECT id, priority FROM jobs WHERE status = ? ORDER BY created_at", (QUEUED,)
+            ).fetchall()
+        for job_id, priority in rows:
+            self._enqueue(job_id, priority)
+        self._worker_tasks = [asyncio.ensure_future(self._worker()) for _ in range(self.workers)]
+
+    async def stop(self):
+        for task in self._worker_tasks:
+            task.cancel()
+        await asyncio.gather(*self._worker_tasks, return_exceptions=True)
+        self._worker_tasks = []
+
+    def submit(self, kind: str, payload: Dict, priority: int = 0) -> str:
+        """Queue a job and return its id. Higher ``priority`` jobs run first, within ±JOB_MAX_PRIORITY."""
+        if kind not in self._handlers:
+            raise ValueError(f"No handler registered for job kind {kind!r}")
+        priority = max(-JOB_MAX_PRIORITY, min(int(priority), JOB_MAX_PRIORITY))
+        job_id = str(uuid.uuid4())
+        now = time.time()
+        with self._lock:
+            self._conn.execute(
+                "INSERT INTO jobs (id, kind, status, priority, payload, created_at, updated_at) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (job_id, kind, QUEUED, priority, json.dumps(payload), now, now),
+            )
+        self._enqueue(job_id, priority)
+        return job_id
+
+    def get(self, job_id: str) -> Optional[Dict]:
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT id, kind, status, priority, result, error, created_at, updated_at FROM jobs WHERE id = ?",
+                (job_id,),
+            ).fetchone()
+        if row is None:
+            return None
+        return {
+            "id": row[0],
+            "kind": row[1],
+            "status": row[2],
+            "priority": row[3],
+            "result": json.loads(row[4]) if row[4] is not None else None,
+            "error": row[5],
+            "created_at": row[6],
+            "updated_at": row[7],
+        }
+
+    def cancel(self, job_id: str) -> bool:
+        """Cancel a queued or running job. Returns False if it already finished or does not exist."""
+        with self._lock:
+            cancelled = self._conn.execute(
+                "UPDATE jobs SET status = ?, updated_at = ? WHERE id = ? AND status IN (?, ?)",
+                (CANCELLED, time.time(), job_id, QUEUED, RUNNING),
+            ).rowcount
+        if not cancelled:
+            return False
+        task = self._running.get(job_id)
+        if task is not None:
+            # The worker notifies once the handler has stopped
+            task.cancel()
+        else:
+            notification = asyncio.ensure_future(self._notify(job_id))
+            self._notifications.add(notification)
+            notification.add_done_callback(self._notifications.discard)
+        return True
+
+    def _enqueue(self, job_id: str, priority: int):
+        if self._queue is not None:
+            self._queue.put_nowait((-priority, next(self._sequence), job_id))
+
+    def _finish(self, job_id: str, status: str, result: Any = None, error: str = None) -> bool:
+        """Move a running job to ``status``; a job cancelled meanwhile keeps its cancelled status."""
+        result = json.dumps(result) if result is not None else None
+        with self._lock:
+            return bool(
+                self._conn.execute(
+                    "UPDATE jobs SET status = ?, result = ?, error = ?, updated_at = ? WHERE id = ? AND status = ?",
+                    (status, result, error, time.time(), job_id, RUNNING),
+                ).rowcount
+            )
+
+    def _claim(self, job_id: str) -> Optional[tuple]:
+        """Move a queued job to running, returning its kind and payload."""
+        with self._lock:
+            row = self._conn.execute("SELECT kind, payload, status FROM jobs WHERE id = ?", (job_id,)).fetchone()
+            if row is None or row[2] != QUEUED:
+                return None
+            self._conn.execute("UPDATE jobs SET status = ?, updated_at = ? WHERE id = ?", (RUNNING, time.time(), job_id))
+        return row[0], json.loads(row[1])
+
+    async def _worker(self):
+        while True:
+            _, _, job_id = await self._queue.get()
+            try:
+                if not await self._run(job_id):
+                    # Cancelled while it was waiting in the queue
+                    continue
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                # e.g. an unknown kind or a result that is not JSON-serializable
+                print(f"Error in background job {job_id}: {str(e)}")
+                try:
+                    self._finish(job_id, FAILED, error=str(e))
+                except Exception as e:
+                    print(f"Error recording failure of job {job_id}: {str(e)}")
+            await self._notify(job_id)
+
+    async def _run(self, job_id: str) -> bool:
+        """Run one queued job and record its outcome. Returns False if it was no longer queued."""
+        claimed = self._claim(job_id)
+        if claimed is None:
+            return False
+        kind, payload = claimed
+        task = asyncio.ensure_future(self._handlers[kind](payload))
+        self._running[job_id] = task
+        try:
+            await asyncio.wait({task})
+        except asyncio.CancelledError:
+            # Server shutdown: put the job back so the next start picks it up
+            task.cancel()
+            self._finish(job_id, QUEUED)
+            raise
+        finally:
+            self._running.pop(job_id, None)
+
+        if task.cancelled():
+            self._finish(job_id, CANCELLED)
+        elif task.exception() is not None:
+            print(f"Error in background job {job_id} ({kind}): {str(task.exception())}")
+            self._finish(job_id, FAILED, error=str(task.exception()))
+        else:
+            self._finish(job_id, DONE, result=task.result())
+        return True
+
+    async def _notify(self, job_id: str):
+        if self.notify is None:
+            return
+        try:
+            await self.notify(self.get(job_id))
+        except Exception as e:
+            print(f"Error notifying completion of job {job_id}: {str(e)}")
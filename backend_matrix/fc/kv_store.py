@@ -0,0 +1,128 @@
+import json
+import os
+import sqlite3
+import threading
+import time
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+
+CACHE_DIR = os.getenv("FC_CACHE_DIR", "./cache")
+
+
+class TTLStore:
+    def __init__(self, name: str, ttl: float, max_entries: Optional[int] = None, stale_ttl: float = 0, path: str = None):
+        """Persistent JSON key-value table with expiry and size-bounded LRU eviction.
+
+        Entries older than ``ttl`` are no longer returned by ``get`` but are kept for
+        another ``stale_ttl`` seconds so callers can serve or revalidate them through
+        ``get_entry``.
+
+        Args:
+            name (str): table name, several stores can share one database file.
+            ttl (float): seconds an entry stays fresh.
+            max_entries (int, optional): evict least recently used entries above this size.
+            stale_ttl (float, optional): extra seconds an expired entry is kept around. Defaults to 0.
+            path (str, optional): SQLite database file. Defaults to CACHE_DIR/fc_cache.sqlite3.
+        """
+        if path is None:
+            os.makedirs(CACHE_DIR, exist_ok=True)
+            path = os.path.join(CACHE_DIR, "fc_cache.sqlite3")
+        self.name = name
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.stale_ttl = stale_ttl
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None, timeout=30)
+        with self._lock:
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute(
+                f"CREATE TABLE IF NOT EXISTS {name} ("
+                "key TEXT PRIMARY KEY, value TEXT NOT NULL, stored_at REAL NOT NULL, accessed_at REAL NOT NULL)"
+            )
+            self._conn.execute(f"CREATE INDEX IF NOT EXISTS {name}_accessed_at ON {name} (accessed_at)")
+
+    def get(self, key: str) -> Optional[Any]:
+        """Return the value for ``key`` if it is still fresh."""
+        entry = self.get_entry(key)
+        if entry is None or entry[1] > self.ttl:
+            return None
+        return entry[0]
+
+    def get_entry(self, key: str) -> Optional[Tuple[Any, float]]:
+        """Return ``(value, age_in_seconds)`` for ``key``, including expired entries not yet purged."""
+        now = time.time()
+        with self._lock:
+            row = self._conn.execute(f"SELECT value, stored_at FROM {self.name} WHERE key = ?", (key,)).fetchone()
+            if row is None:
+                return None
+            age = now - row[1]
+            if age > self.ttl + self.stale_ttl:
+                self._conn.execute(f"DELETE FROM {self.name} WHERE key = ?", (key,))
+                return None
+            self._conn.execute(f"UPDATE {self.name} SET accessed_at = ? WHERE key = ?", (now, key))
+        return json.loads(row[0]), age
+
+    def set(self, key: str, value: Any):
+        now = time.time()
+        with self._lock:
+            self._conn.execute(
+                f"INSERT OR REPLACE INTO {self.name} (key, value, stored_at, accessed_at) VALUES (?, ?, ?, ?)",
+                (key, json.dumps(value), now, now),
+            )
+            self._evict()
+
+    def get_many(self, keys: Iterable[str]) -> Dict[str, Any]:
+        """Return ``{key: value}`` for the given keys that are still fresh."""
+        values = {}
+        for key in keys:
+            value = self.get(key)
+            if value is not None:
+                values[key] = value
+        return values
+
+    def set_many(self, items: List[Tuple[str, Any]]):
+        """Store several ``(key, value)`` pairs in one transaction."""
+        now = time.time()
+        rows = [(key, json.dumps(value), now, now) for key, value in items]
+        with self._lock:
+            self._conn.execute("BEGIN")
+            try:
+                self._conn.executemany(
+                    f"INSERT OR REPLACE INTO {self.name} (key, value, stored_at, accessed_at) VALUES (?, ?, ?, ?)",
+                    rows,
+                )
+                self._evict()
+            except BaseException:
+                self._conn.execute("ROLLBACK")
+                raise
+            self._conn.execute("COMMIT")
+
+    def touch(self, key: str):
+        """Mark ``key`` as freshly stored without rewriting its value."""
+        now = time.time()
+        with self._lock:
+            self._conn.execute(f"UPDATE {self.name} SET stored_at = ?, accessed_at = ? WHERE key = ?", (now, now, key))
+
+    def delete(self, key: str):
+        with self._lock:
+            self._conn.execute(f"DELETE FROM {self.name} WHERE key = ?", (key,))
+
+    def purge_expired(self):
+        with self._lock:
+            self._conn.execute(f"DELETE FROM {self.name} WHERE stored_at < ?", (time.time() - self.ttl - self.stale_ttl,))
+
+    def __len__(self):
+        with self._lock:
+            return self._conn.execute(f"SELECT COUNT(*) FROM {self.name}").fetchone()[0]
+
+    def _evict(self):
+        # Caller holds the lock
+        if self.max_entries is None:
+            return
+        count = self._conn.execute(f"SELECT COUNT(*) FROM {self.name}").fetchone()[0]
+        if count > self.max_entries:
+            self._conn.execute(
+                f"DELETE FROM {self.name} WHERE key IN "
+                f"(SELECT key FROM {self.name} ORDER BY accessed_at ASC LIMIT ?)",
+                (count - self.max_entries,),
+            )
@@ -0,0 +1,141 @@
+import hashlib
+import os
+import re
+import sqlite3
+import threading
+import time
+from typing import Dict, Iterable, List, Optional
+from urllib.parse import urlsplit
+
+from .kv_store import CACHE_DIR
+
+
+LOCAL_INDEX_ENABLED = os.getenv("LOCAL_INDEX_ENABLED", "true").lower() in ("1", "true", "yes")
+# Never call Serper or crawl; evidence comes from the local index and cached pages only
+FC_OFFLINE = os.getenv("FC_OFFLINE", "false").lower() in ("1", "true", "yes")
+# A query is answered locally when passages from at least this many different sites
+# each cover enough of its terms
+LOCAL_INDEX_MIN_SOURCES = int(os.getenv("LOCAL_INDEX_MIN_SOURCES", "3"))
+LOCAL_INDEX_MIN_COVERAGE = float(os.getenv("LOCAL_INDEX_MIN_COVERAGE", "0.85"))
+
+_WORD = re.compile(r"\w+")
+_STOPWORDS = frozenset(
+    "a an and are as at be by did do does for from has have how in is it its of on or that the this to was "
+    "were what when where which who whom why will with".split()
+)
+
+
+def _terms(text: str) -> List[str]:
+    return [word for word in _WORD.findall(text.casefold()) if word not in _STOPWORDS]
+
+
+class LocalEvidenceIndex:
+    def __init__(self, path: str = None):
+        """Full-text index (SQLite FTS5) of third-party evidence articles seen so far.
+
+        Passages are added as evidence pages are extracted, and searched before any web
+        search so recurring topics need no network round trip. Articles being
+        fact-checked are never added, so a claim cannot come back as its own evidence.
+
+        Args:
+            path (str, optional): SQLite database file. Defaults to CACHE_DIR/evidence_index.sqlite3.
+        """
+        if path is None:
+            os.makedirs(CACHE_DIR, exist_ok=True)
+            path = os.path.join(CACHE_DIR, "evidence_index.sqlite3")
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None, timeout=30)
+        with self._lock:
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute(
+                "CREATE VIRTUAL TABLE IF NOT EXISTS passages USING fts5("
+                "url UNINDEXED, title, text, tokenize='porter unicode61')"
+            )
+            # url -> passage row and content hash, so re-adding an unchanged passage is a no-op
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS passage_urls ("
+                "url TEXT PRIMARY KEY, rowid_ INTEGER NOT NULL, digest TEXT NOT NULL, added_at REAL NOT NULL)"
+            )
+
+    def add(self, url: str, text: str, title: str = ""):
+        """Index ``text`` under ``url``, replacing what was indexed for it before."""
+        if not url or not text or not text.strip():
+            return
+        digest = hashlib.sha256(f"{title}\n{text}".encode("utf-8")).hexdigest()
+        with self._lock:
+            row = self._conn.execute("SELECT rowid_, digest FROM passage_urls WHERE url = ?", (url,)).fetchone()
+            if row is not None and row[1] == digest:
+                return
+            self._conn.execute("BEGIN")
+            try:
+                if row is not None:
+                    self._conn.execute("DELETE FROM passages WHERE rowid = ?", (row[0],))
+                cursor = self._conn.execute("INSERT INTO passages (url, title, text) VALUES (?, ?, ?)", (url, title, text))
+                self._conn.execute(
+                    "INSERT OR REPLACE INTO passage_urls (url, rowid_, digest, added_at) VALUES (?, ?, ?, ?)",
+                    (url, cursor.lastrowid, digest, time.time()),
+                )
+                self._conn.execute("COMMIT")
+            except Exception:
+                self._conn.execute("ROLLBACK")
+                raise
+
+    def add_articles(self, articles: Iterable[Dict]):
+        """Index get_news style dicts (``url``, ``title``, ``summary``), skipping failed ones."""
+        for article in articles:
+            if article and article.get("status", "success") == "success":
+                self.add(article.get("url", ""), article.get("summary", ""), article.get("title", ""))
+
+    def search(self, query: str, limit: int = 3) -> List[Dict]:
+        """Best matching passages for ``query``, as dicts with ``url``, ``title``, ``text`` and ``coverage``.
+
+        ``coverage`` is the share of the query's terms found in the passage.
+        """
+        terms = list(dict.fromkeys(_terms(query)))
+        if not terms:
+            return []
+        match = " OR ".join('"{}"'.format(term.replace('"', '""')) for term in terms)
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT url, title, text FROM passages WHERE passages MATCH ? ORDER BY bm25(passages) LIMIT ?",
+                (match, limit),
+            ).fetchall()
+        results = []
+        for url, title, text in rows:
+            passage_terms = set(_terms(f"{title} {text}"))
+            coverage = sum(term in passage_terms for term in terms) / len(terms)
+            results.append({"url": url, "title": title, "text": text, "coverage": round(coverage, 3)})
+        return results
+
+    def lookup(self, query: str, limit: int = 3) -> Optional[List[Dict]]:
+        """Passages answering ``query`` well enough to skip a web search, or None.
+
+        Only the best passage of each site counts, and enough different sites must
+        cover the query; offline, whatever matches is returned.
+        """
+        hits = {}
+        for hit in self.search(query, limit * 4):
+            domain = urlsplit(hit["url"]).hostname or hit["url"]
+            if hit["coverage"] >= LOCAL_INDEX_MIN_COVERAGE and domain not in hits:
+                hits[domain] = hit
+        hits = list(hits.values())[:limit]
+        if FC_OFFLINE:
+            return hits
+        return hits if len(hits) >= min(LOCAL_INDEX_MIN_SOURCES, limit) else None
+
+    def __len__(self):
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM passage_urls").fetchone()[0]
+
+
+_local_index = None
+
+
+def get_local_index() -> Optional[LocalEvidenceIndex]:
+    """Process-wide local evidence index, or None when LOCAL_INDEX_ENABLED is off (and not offline)."""
+    global _local_index
+    if not (LOCAL_INDEX_ENABLED or FC_OFFLINE):
+        return None
+    if _local_index is None:
+        _local_index = LocalEvidenceIndex()
+    return _local_index
@@ -1,28 +1,17 @@
-from newspaper import Article
-import nltk
-import os
+from .article_service import get_article_service, nltk_data_dir
 
 
-nltk_data_dir = "nltk_data"
-nltk.data.path.insert(0, nltk_data_dir)
-
 print(f"Looking for nltk data in: {nltk_data_dir}")
 
-def get_news(url):
-    try:
-        article = Article(url)
-        article.download()
-        article.parse()
-        article.nlp()
-        
-        return {
-            'status': 'success',
-            'summary': article.summary,
-            'title': article.title,
-            'url': url
-        }
-    except Exception as e:
-        return {
-            'status': 'error',
-            'message': str(e)
-        }
+def get_news(url, html=None, with_text=False):
+    """Title and summary of the article at ``url``, cached by canonical URL.
+
+    Returns a dict with ``status`` "success" and ``title``, ``summary`` and ``url``, plus
+    the article body as ``text`` with ``with_text``, or ``status`` "error" and a ``message``.
+    """
+    return get_article_service().get(url, html, with_text)
+
+
+async def get_news_async(url, html=None, with_text=False):
+    """Awaitable get_news that keeps parsing off the event loop and out of the server process."""
+    return await get_article_service().get_async(url, html, with_text)
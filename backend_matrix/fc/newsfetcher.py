@@ -1,7 +1,7 @@
 from newsapi.newsapi_client import NewsApiClient
 import os
 from dotenv import load_dotenv
-from .news_summ import get_news
+from .news_summ import get_news_async
 import uuid
 from db.database_service import DatabaseService
 from factcheck_instance import fact_checker_instance
@@ -26,7 +26,7 @@ class NewsFetcher:
         return False
 
         
-    def process_single_news(self):
+    async def process_single_news(self):
         news = self.db_service.get_unprocessed_news()
 
         if not news:
@@ -50,18 +50,18 @@ class NewsFetcher:
                 # Store new news
                 self.db_service.store_news(new_news['articles'])
                 # Process first new article immediately
-                return self.process_single_news()
+                return await self.process_single_news()
             
             self.fetch_initial_news()
             return {'status': 'refresh', 'content': 'Refreshing news database'}
         
-        news_text = get_news(news['url'])
+        news_text = await get_news_async(news['url'])
         if news_text['status'] == 'error' or len(news_text["summary"]) == 0:
             # remove the news from the database
             self.db_service.news_ref.document(news['id']).delete()
             return { "status": "error", "content": "Error fetching news" }
         
-        fact_check_result = self.fact_checker.generate_report(news_summ=news_text['summary'])
+        fact_check_result = await self.fact_checker.generate_report(news_summ=news_text['summary'])
         
         article_object = {
             "id": str(uuid.uuid4()),
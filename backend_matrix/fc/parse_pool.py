@@ -0,0 +1,146 @@
+import asyncio
+import math
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import Callable, Iterable, List
+
+
+def available_cpus() -> int:
+    """CPUs this process may actually use: the affinity mask capped by the cgroup CPU quota."""
+    try:
+        cpus = len(os.sched_getaffinity(0))
+    except AttributeError:
+        cpus = os.cpu_count() or 1
+
+    quota = None
+    try:
+        # cgroup v2: "<quota> <period>" or "max <period>"
+        with open("/sys/fs/cgroup/cpu.max") as f:
+            limit, period = f.read().split()[:2]
+        if limit != "max":
+            quota = int(limit) / int(period)
+    except (OSError, ValueError):
+        try:
+            # cgroup v1, -1 means no limit
+            with open("/sys/fs/cgroup/cpu/cpu.cfs_quota_us") as f:
+                limit = int(f.read())
+            with open("/sys/fs/cgroup/cpu/cpu.cfs_period_us") as f:
+                period = int(f.read())
+            if limit > 0 and period > 0:
+                quota = limit / period
+        except (OSError, ValueError):
+            pass
+
+    if quota is not None:
+        cpus = min(cpus, math.ceil(quota))
+    return max(1, cpus)
+
+
+PARSE_POOL_WORKERS = int(os.getenv("PARSE_POOL_WORKERS", "0")) or available_cpus()
+
+_parse_pool = None
+_worker_initializers: List[Callable] = []
+# Set in each worker process by _init_worker
+_worker_init_errors: List[str] = []
+
+
+def register_worker_initializer(fn: Callable):
+    """Run ``fn`` once in every parse pool worker as it starts, e.g. to load data files.
+
+    Must be registered before the pool is created. A failing initializer does not
+    break the pool, but is reported and makes ``warm_parse_pool`` raise.
+    """
+    if fn not in _worker_initializers:
+        _worker_initializers.append(fn)
+
+
+def _init_worker(initializers):
+    for fn in initializers:
+        try:
+            fn()
+        except Exception as e:
+            _worker_init_errors.append(f"{fn.__name__}: {str(e)}")
+            print(f"Error initializing parse pool worker with {fn.__name__}: {str(e)}")
+
+
+def _init_errors() -> List[str]:
+    return list(_worker_init_errors)
+
+
+def get_parse_pool() -> ProcessPoolExecutor:
+    """Process-wide pool for CPU-bound HTML parsing, created on first use."""
+    global _parse_pool
+    if _parse_pool is None:
+        # Forking the threaded server could copy a held lock into a worker, so workers are forked
+        # from a single-threaded fork server that imports only the parsing modules. Like spawned ones,
+        # they re-import the entry script, which is gunicorn's or uvicorn's rather than main.py when
+        # the server is started through them
+        method = "forkserver" if "forkserver" in multiprocessing.get_all_start_methods() else "spawn"
+        context = multiprocessing.get_context(method)
+        if method == "forkserver":
+            context.set_forkserver_preload(list(dict.fromkeys(fn.__module__ for fn in _worker_initializers)))
+        _parse_pool = ProcessPoolExecutor(
+            max_workers=PARSE_POOL_WORKERS,
+            mp_context=context,
+            initializer=_init_worker,
+            initargs=(tuple(_worker_initializers),),
+        )
+    return _parse_pool
+
+
+def warm_parse_pool():
+    """Start the workers now rather than on the first request; blocks until they are up.
+
+    Workers start on demand, so one task is submitted per worker.
+
+    Raises:
+        RuntimeError: a worker initializer failed, e.g. bundled data files are missing.
+    """
+    pool = get_parse_pool()
+    checks = [pool.submit(_init_errors) for _ in range(PARSE_POOL_WORKERS)]
+    errors = sorted({error for check in checks for error in check.result()})
+    if errors:
+        raise RuntimeError(f"Error initializing parse pool workers: {'; '.join(errors)}")
+
+
+def shutdown_parse_pool():
+    global _parse_pool
+    if _parse_pool is not None:
+        _parse_pool.shutdown(wait=False, cancel_futures=True)
+        _parse_pool = None
+
+
+def parse_map_sync(fn: Callable, *iterables: Iterable) -> List:
+    """Blocking ``map(fn, *iterables)`` on the parse pool.
+
+    ``fn`` must be a module-level function; keep its arguments and results to plain
+    bytes and strings so little has to be pickled across the process boundary.
+    """
+    global _parse_pool
+    args = list(zip(*iterables))
+    if not args:
+        return []
+    try:
+        return list(get_parse_pool().map(fn, *zip(*args), chunksize=max(1, len(args) // (4 * PARSE_POOL_WORKERS))))
+    except BrokenProcessPool as e:
+        print(f"Error in parse pool, parsing in process: {str(e)}")
+        _parse_pool = None
+        return [fn(*arg) for arg in args]
+
+
+async def parse_map(fn: Callable, *iterables: Iterable) -> List:
+    """Awaitable ``map(fn, *iterables)`` on the parse pool; see ``parse_map_sync``."""
+    global _parse_pool
+    args = list(zip(*iterables))
+    if not args:
+        return []
+    loop = asyncio.get_running_loop()
+    pool = get_parse_pool()
+    try:
+        return await asyncio.gather(*(loop.run_in_executor(pool, fn, *arg) for arg in args))
+    except BrokenProcessPool as e:
+        print(f"Error in parse pool, parsing in a thread: {str(e)}")
+        _parse_pool = None
+        return await asyncio.to_thread(lambda: [fn(*arg) for arg in args])
@@ -0,0 +1,110 @@
+import asyncio
+import hashlib
+import os
+import unicodedata
+from typing import Awaitable, Callable, Dict, Optional
+
+from .kv_store import TTLStore
+
+
+REPORT_CACHE_TTL = float(os.getenv("REPORT_CACHE_TTL", "21600"))
+REPORT_CACHE_MAX_ENTRIES = int(os.getenv("REPORT_CACHE_MAX_ENTRIES", "2000"))
+
+
+def normalize_text(text: str) -> str:
+    """Unicode-normalize, casefold and collapse whitespace so equivalent inputs hash alike."""
+    return " ".join(unicodedata.normalize("NFKC", text).casefold().split())
+
+
+def report_key(text: str) -> str:
+    return hashlib.sha256(normalize_text(text).encode("utf-8")).hexdigest()
+
+
+class ReportCache:
+    def __init__(self, ttl: float = REPORT_CACHE_TTL, max_entries: int = REPORT_CACHE_MAX_ENTRIES):
+        """Persistent fact-check report cache keyed by a hash of the normalized input text.
+
+        Concurrent requests for the same text share one in-flight computation. The
+        SQLite store is only read and written in threads, off the event loop.
+
+        Args:
+            ttl (float): seconds a cached report is served for.
+            max_entries (int): maximum number of reports kept on disk.
+        """
+        self.store = TTLStore("reports", ttl=ttl, max_entries=max_entries)
+        self._in_flight: Dict[str, asyncio.Task] = {}
+        # Number of get_or_compute callers awaiting each in-flight computation
+        self._waiters: Dict[str, int] = {}
+        self._writes = set()
+
+    async def get(self, text: str):
+        return await asyncio.to_thread(self.store.get, report_key(text))
+
+    async def set(self, text: str, report: Dict):
+        await asyncio.to_thread(self._store, report_key(text), report)
+
+    def _store(self, key: str, report: Dict):
+        # Reports whose analysis failed, that had no evidence or that fell back to search
+        # snippets under the deadline are not worth serving again
+        if report and report.get("detailed_analysis") and report.get("sources") and not report.get("degraded_sources"):
+            try:
+                self.store.set(key, report)
+            except Exception as e:
+                print(f"Error caching fact-check report: {str(e)}")
+
+    def in_flight(self, text: str) -> Optional[asyncio.Task]:
+        """The running computation of the report for ``text``, if any."""
+        return self._in_flight.get(report_key(text))
+
+    def start(self, text: str, compute: Callable[[], Awaitable[Dict]]) -> asyncio.Task:
+        """Start computing the report for ``text`` so that concurrent callers join it; cached once done."""
+        key = report_key(text)
+        task = self._in_flight.get(key)
+        if task is None:
+            task = asyncio.ensure_future(compute())
+            self._in_flight[key] = task
+            task.add_done_callback(lambda t: self._on_done(key, t))
+        return task
+
+    def waiting(self, text: str) -> int:
+        """Number of callers of ``get_or_compute`` waiting for the report for ``text``."""
+        return self._waiters.get(report_key(text), 0)
+
+    async def get_or_compute(self, text: str, compute: Callable[[], Awaitable[Dict]]) -> Dict:
+        """Return the cached report for ``text`` or compute it once for all concurrent callers.
+
+        Args:
+            text (str): the text being fact-checked.
+            compute (callable): coroutine factory producing the report on a cache miss.
+
+        Returns:
+            dict: the fact-check report, with ``original_text`` set to the caller's text.
+        """
+        key = report_key(text)
+        report = None
+        if key not in self._in_flight:
+            report = await asyncio.to_thread(self.store.get, key)
+        if report is None:
+            task = self.start(text, compute)
+            self._waiters[key] = self._waiters.get(key, 0) + 1
+            try:
+                # The computation is owned by the cache, so one caller going away does not cancel it for the others
+                report = await asyncio.shield(task)
+            finally:
+                self._waiters[key] -= 1
+                if not self._waiters[key]:
+                    del self._waiters[key]
+        return {**report, "original_text": text}
+
+    def _on_done(self, key: str, task: asyncio.Task):
+        if task.cancelled() or task.exception() is not None:
+            self._forget(key, task)
+            return
+        # Until the report is on disk, new callers are served by the finished task
+        write = asyncio.ensure_future(asyncio.to_thread(self._store, key, task.result()))
+        self._writes.add(write)
+        write.add_done_callback(lambda _: (self._writes.discard(write), self._forget(key, task)))
+
+    def _forget(self, key: str, task: asyncio.Task):
+        if self._in_flight.get(key) is task:
+            del self._in_flight[key]
@@ -1,10 +1,11 @@
 import json
 import requests
-import bs4
 from typing import List, Dict
-from concurrent.futures import ThreadPoolExecutor
+import asyncio
 import os
-from web_helper import crawl_web, is_tag_visible
+from .web_helper import crawl_web
+from .snippet_locator import extend_snippets as extend_page_snippets
+from .parse_pool import parse_map
 
 class SerperSearch:
     def __init__(self, api_key: str):
@@ -15,7 +16,7 @@ class SerperSearch:
             'Content-Type': 'application/json'
         }
 
-    def search(self, query: str, num_results: int = 3, extend_snippets: bool = True) -> List[Dict]:
+    async def search(self, query: str, num_results: int = 3, extend_snippets: bool = True) -> List[Dict]:
         # Initial search request
         payload = {
             'q': query,
@@ -23,7 +24,8 @@ class SerperSearch:
             'autocorrect': False
         }
         
-        response = requests.post(
+        response = await asyncio.to_thread(
+            requests.post,
             self.base_url,
             headers=self.headers,
             json=payload
@@ -55,10 +57,10 @@ class SerperSearch:
             }
             
             # Crawl web pages for extended content
-            crawl_responses = crawl_web(query_url_dict)
+            crawl_responses = await crawl_web(query_url_dict)
             
             # Process crawled content
-            extended_snippets = self._process_crawled_content(
+            extended_snippets = await self._process_crawled_content(
                 crawl_responses, 
                 [result.get('snippet', '') for result in organic_results]
             )
@@ -88,37 +90,21 @@ class SerperSearch:
             for i, result in enumerate(organic_results)
         ][:4]
 
-    def _process_crawled_content(self, crawl_responses, original_snippets) -> List[str]:
-        def extend_snippet(response, original_snippet, flag):
-            if not flag or not response or '.pdf' in str(response.url):
-                return original_snippet
-            
-            try:
-                soup = bs4.BeautifulSoup(response.text, 'html.parser')
-                text = soup.get_text()
-                
-                # Find the snippet context
-                snippet_start = text.find(original_snippet[:50])  # Use first 50 chars to find match
-                if snippet_start == -1:
-                    return original_snippet
-                
-                # Extract extended context
-                pre_context = 0
-                post_context = 500
-                start = max(0, snippet_start - pre_context)
-                end = min(len(text), snippet_start + len(original_snippet) + post_context)
-                
-                extended_text = text[start:end].strip()
-                return f"{extended_text}..."
-            except Exception:
-                return original_snippet
-
-        with ThreadPoolExecutor(max_workers=os.cpu_count()) as executor:
-            extended_snippets = list(executor.map(
-                lambda x: extend_snippet(x[0][1], x[1], x[0][0]),
-                zip(crawl_responses, original_snippets)
-            ))
-            
+    async def _process_crawled_content(self, crawl_responses, original_snippets) -> List[str]:
+        # Each page is parsed once for all of its snippets
+        page_snippets = {}
+        for i, (flag, response, _, _) in enumerate(crawl_responses):
+            if flag and response and '.pdf' not in str(response.url):
+                page_snippets.setdefault(str(response.url), (response, []))[1].append(i)
+        extended_snippets = list(original_snippets)
+        extended = await parse_map(
+            extend_page_snippets,
+            [response.text.encode('utf-8') for response, _ in page_snippets.values()],
+            [[original_snippets[i] for i in indices] for _, indices in page_snippets.values()],
+        )
+        for (_, indices), snippets in zip(page_snippets.values(), extended):
+            for i, snippet in zip(indices, snippets):
+                extended_snippets[i] = snippet
         return extended_snippets
 
     def batch_search(self, queries: List[str], num_results: int = 5) -> Dict[str, List[Dict]]:
@@ -0,0 +1,212 @@
+import asyncio
+import json
+import os
+from typing import Dict, List, Optional
+
+import httpx
+
+from .kv_store import TTLStore
+from .report_cache import normalize_text
+from .web_helper import discard_async_client
+
+
+SERPER_URL = "https://google.serper.dev/search"
+SERPER_TIMEOUT = float(os.getenv("SERPER_TIMEOUT", "30"))
+# How long queries from concurrent callers are collected before one request is sent
+SERPER_BATCH_WINDOW_MS = float(os.getenv("SERPER_BATCH_WINDOW_MS", "10"))
+# Serper accepts at most 100 queries per request
+SERPER_MAX_BATCH = min(int(os.getenv("SERPER_MAX_BATCH", "100")), 100)
+SERPER_CACHE_TTL = float(os.getenv("SERPER_CACHE_TTL", str(24 * 3600)))
+SERPER_CACHE_MAX_ENTRIES = int(os.getenv("SERPER_CACHE_MAX_ENTRIES", "20000"))
+
+
+_serper_client = None
+_serper_loop = None
+
+
+def get_serper_client() -> httpx.AsyncClient:
+    """Process-wide pooled client for the Serper API, rebuilt when used from another event loop."""
+    global _serper_client, _serper_loop
+    loop = asyncio.get_running_loop()
+    if _serper_client is None or _serper_client.is_closed or _serper_loop is not loop:
+        discard_async_client(_serper_client, _serper_loop)
+        _serper_client = httpx.AsyncClient(
+            timeout=SERPER_TIMEOUT,
+            limits=httpx.Limits(max_connections=10, max_keepalive_connections=10),
+        )
+        _serper_loop = loop
+    return _serper_client
+
+
+async def close_serper_client():
+    global _serper_client
+    if _serper_client is not None:
+        await _serper_client.aclose()
+        _serper_client = None
+
+
+async def request_serper_api(api_key: str, queries: List[str]) -> httpx.Response:
+    """POST one multi-query request to Serper.
+
+    Args:
+        api_key (str): Serper API key.
+        queries (list[str]): at most 100 queries.
+
+    Returns:
+        httpx.Response: the successful response, one JSON result per query.
+    """
+    headers = {
+        "X-API-KEY": api_key,
+        "Content-Type": "application/json",
+    }
+    payload = json.dumps([{"q": query, "autocorrect": False} for query in queries])
+    response = await get_serper_client().post(SERPER_URL, headers=headers, content=payload)
+
+    if response.status_code == 200:
+        return response
+    elif response.status_code == 403:
+        raise Exception("Failed to authenticate. Check your API key.")
+    else:
+        raise Exception(f"Error occurred: {response.text}")
+
+
+class RateLimiter:
+    def __init__(self, rate: float):
+        """Spaces calls to ``wait`` at least ``1 / rate`` seconds apart; a rate of 0 disables it."""
+        self.interval = 1 / rate if rate > 0 else 0
+        self._next = 0.0
+        self._lock = asyncio.Lock()
+
+    async def wait(self):
+        async with self._lock:
+            now = asyncio.get_running_loop().time()
+            delay = self._next - now
+            self._next = max(now, self._next) + self.interval
+        if delay > 0:
+            await asyncio.sleep(delay)
+
+
+class SerperDispatcher:
+    def __init__(
+        self,
+        api_key: str,
+        window_ms: float = SERPER_BATCH_WINDOW_MS,
+        max_batch: int = SERPER_MAX_BATCH,
+        cache_ttl: float = SERPER_CACHE_TTL,
+        cache_max_entries: int = SERPER_CACHE_MAX_ENTRIES,
+    ):
+        """Coalesces Serper queries from concurrent callers into shared multi-query requests.
+
+        Queries are collected for ``window_ms`` milliseconds, or until ``max_batch`` are
+        waiting, and then sent in one request; each caller gets back the results of its
+        own queries. Identical queries are only searched once and results are cached
+        by normalized query.
+
+        Args:
+            api_key (str): Serper API key.
+            window_ms (float, optional): milliseconds to wait for more queries before sending.
+            max_batch (int, optional): send as soon as this many distinct queries are waiting.
+            cache_ttl (float, optional): seconds a query result is served from the cache.
+            cache_max_entries (int, optional): maximum number of cached query results.
+        """
+        self.api_key = api_key
+        self.window = window_ms / 1000
+        self.max_batch = max_batch
+        self.cache = TTLStore("serper_queries", ttl=cache_ttl, max_entries=cache_max_entries)
+        # normalized query -> (query as sent, future of its result)
+        self._pending: Dict[str, tuple] = {}
+        self._flush_handle: Optional[asyncio.TimerHandle] = None
+        self._batches = set()
+
+    async def search(self, queries: List[str]) -> List[Dict]:
+        """Return the Serper result of every query, in order.
+
+        Raises the request error if the batch carrying one of the queries failed.
+        """
+        results: List[Optional[Dict]] = [None] * len(queries)
+        waiting = []
+        keys = [normalize_text(query) for query in queries]
+        try:
+            cache = await asyncio.to_thread(self.cache.get_many, keys)
+        except Exception as e:
+            print(f"Error reading serper cache: {str(e)}")
+            cache = {}
+        for i, (key, query) in enumerate(zip(keys, queries)):
+            cached = cache.get(key)
+            if cached is not None:
+                results[i] = cached
+            else:
+                waiting.append((i, self._submit(key, query)))
+
+        if waiting:
+            # Shielded because a future may be shared with other callers
+            responses = await asyncio.gather(*(asyncio.shield(future) for _, future in waiting))
+            for (i, _), response in zip(waiting, responses):
+                results[i] = response
+
+        # Results may come from a differently-cased query, report the caller's own
+        return [
+            {**result, "searchParameters": {**result.get("searchParameters", {}), "q": query}}
+            for query, result in zip(queries, results)
+        ]
+
+    async def search_uncached(self, queries: List[str]) -> List[Dict]:
+        """Search ``queries`` in requests of their own, without reading or filling the cache.
+
+        For bulk runs, whose one-off queries would otherwise evict the interactive entries.
+        Raises the request error of the first failed request.
+        """
+        results = []
+        for start in range(0, len(queries), self.max_batch):
+            chunk = queries[start : start + self.max_batch]
+            responses = (await request_serper_api(self.api_key, chunk)).json()
+            if len(responses) != len(chunk):
+                raise Exception(f"Serper returned {len(responses)} results for {len(chunk)} queries")
+            results += responses
+        return results
+
+    def _submit(self, key: str, query: str) -> asyncio.Future:
+        if key in self._pending:
+            return self._pending[key][1]
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        # Nobody may be left to read the error if every caller was cancelled
+        future.add_done_callback(lambda f: f.cancelled() or f.exception())
+        self._pending[key] = (query, future)
+        if len(self._pending) >= self.max_batch:
+            self._flush()
+        elif self._flush_handle is None:
+            self._flush_handle = loop.call_later(self.window, self._flush)
+        return future
+
+    def _flush(self):
+        if self._flush_handle is not None:
+            self._flush_handle.cancel()
+            self._flush_handle = None
+        batch, self._pending = self._pending, {}
+        if not batch:
+            return
+        task = asyncio.ensure_future(self._send(batch))
+        self._batches.add(task)
+        task.add_done_callback(self._batches.discard)
+
+    async def _send(self, batch: Dict[str, tuple]):
+        queries = [query for query, _ in batch.values()]
+        try:
+            responses = (await request_serper_api(self.api_key, queries)).json()
+            if len(responses) != len(queries):
+                raise Exception(f"Serper returned {len(responses)} results for {len(queries)} queries")
+        except Exception as e:
+            for _, future in batch.values():
+                if not future.done():
+                    future.set_exception(e)
+            return
+
+        for (_, future), response in zip(batch.values(), responses):
+            if not future.done():
+                future.set_result(response)
+        # Written after the callers got their results, in one transaction off the event loop
+        try:
+            await asyncio.to_thread(self.cache.set_many, list(zip(batch.keys(), responses)))
+        except Exception as e:
+            print(f"Error caching serper result: {str(e)}")
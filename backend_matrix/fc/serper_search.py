@@ -1,154 +1,21 @@
-from concurrent.futures import ThreadPoolExecutor
 import json
 import requests
 import dotenv
 import os
 import re
-import bs4
 
 dotenv.load_dotenv()
 
 ################################################################################################
-import requests
-import time
-import bs4
 import asyncio
-from httpx import AsyncHTTPTransport
-from httpx._client import AsyncClient
-
-
-USER_AGENT = "Mozilla/5.0 (Macintosh; Intel Mac OS X 10.14; rv:65.0) Gecko/20100101 Firefox/65.0"
-# mobile user-agent
-MOBILE_USER_AGENT = "Mozilla/5.0 (Linux; Android 7.0; SM-G930V Build/NRD90M) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/59.0.3071.125 Mobile Safari/537.36"
-headers = {"User-Agent": USER_AGENT}
-
-
-def is_tag_visible(element: bs4.element) -> bool:
-    """Determines if an HTML element is visible.
-
-    Args:
-        element: A BeautifulSoup element to check the visibility of.
-    returns:
-        Whether the element is visible.
-    """
-    if element.parent.name in [
-        "style",
-        "script",
-        "head",
-        "title",
-        "meta",
-        "[document]",
-    ] or isinstance(element, bs4.element.Comment):
-        return False
-    return True
-
-
-transport = AsyncHTTPTransport(retries=3)
-
-
-async def httpx_get(url: str, headers: dict):
-    try:
-        async with AsyncClient(transport=transport) as client:
-            response = await client.get(url, headers=headers, timeout=3)
-            response = response if response.status_code == 200 else None
-            if not response:
-                return False, None
-            else:
-                return True, response
-    except Exception as e:  # noqa: F841
-        return False, None
-
-
-async def httpx_bind_key(url: str, headers: dict, key: str = ""):
-    flag, response = await httpx_get(url, headers)
-    return flag, response, url, key
-
-
-def crawl_web(query_url_dict: dict):
-    tasks = list()
-    for query, urls in query_url_dict.items():
-        for url in urls:
-            task = httpx_bind_key(url=url, headers=headers, key=query)
-            tasks.append(task)
-    asyncio.set_event_loop(asyncio.SelectorEventLoop())
-    loop = asyncio.get_event_loop()
-    responses = loop.run_until_complete(asyncio.gather(*tasks))
-    return responses
-
-
-# @backoff.on_exception(backoff.expo, (requests.exceptions.RequestException, requests.exceptions.Timeout), max_tries=1,max_time=3)
-def common_web_request(url: str, query: str = None, timeout: int = 3):
-    resp = requests.get(url, headers=headers, timeout=timeout)
-    if query:
-        return resp, query
-    else:
-        return resp
-
-
-def parse_response(response: requests.Response, url: str, query: str = None):
-    html_content = response.text
-    url = url
-    try:
-        soup = bs4.BeautifulSoup(html_content, "html.parser")
-        texts = soup.findAll(text=True)
-        # Filter out invisible text from the page.
-        visible_text = filter(is_tag_visible, texts)
-    except Exception as _:  # noqa: F841
-        return None, url, query
-
-    # Returns all the text concatenated as a string.
-    web_text = " ".join(t.strip() for t in visible_text).strip()
-    # Clean up spacing.
-    web_text = " ".join(web_text.split())
-    return web_text, url, query
-
-
-def scrape_url(url: str, timeout: float = 3):
-    """Scrapes a URL for all text information.
-
-    Args:
-        url: URL of webpage to scrape.
-        timeout: Timeout of the requests call.
-    Returns:
-        web_text: The visible text of the scraped URL.
-        url: URL input.
-    """
-    # Scrape the URL
-    try:
-        response = requests.get(url, timeout=timeout)
-        response.raise_for_status()
-    except requests.exceptions.RequestException as _:  # noqa: F841
-        return None, url
-
-    # Extract out all text from the tags
-    try:
-        soup = bs4.BeautifulSoup(response.text, "html.parser")
-        texts = soup.findAll(text=True)
-        # Filter out invisible text from the page.
-        visible_text = filter(is_tag_visible, texts)
-    except Exception as _:  # noqa: F841
-        return None, url
-
-    # Returns all the text concatenated as a string.
-    web_text = " ".join(t.strip() for t in visible_text).strip()
-    # Clean up spacing.
-    web_text = " ".join(web_text.split())
-    return web_text, url
-
-
-def crawl_google_web(response, top_k: int = 10):
-    soup = bs4.BeautifulSoup(response.text, "html.parser")
-    # with open("text%d.html"%time.time(), 'w') as fw:
-    #     fw.write(response.text)
-    valid_node_list = list()
-    for node in soup.find_all("a", {"href": True}):
-        if node.findChildren("h3"):
-            valid_node_list.append(node)
-    result_urls = list()
-    for node in valid_node_list:
-        result_urls.append(node.get("href"))
-    # result_urls = [link.get("href") for link in node if link.get("href")]
-    return result_urls[:top_k]
+import itertools
+from typing import AsyncIterator, Iterable, Optional, Tuple
+from .web_helper import crawl_web
+from .snippet_locator import extend_snippets
+from .parse_pool import parse_map
+from .serper_dispatcher import SERPER_MAX_BATCH, RateLimiter, SerperDispatcher, request_serper_api
+from .local_index import get_local_index
+from .document_store import DocumentStore, get_disk_document_cache
 
 ################################################################################################
 
@@ -180,29 +47,63 @@ class CustomLogger:
 
 logger = CustomLogger(__name__).getlog()
 
+# Seconds crawling and snippet extension may take per retrieve_evidence call, 0 waits for every page
+EVIDENCE_DEADLINE = float(os.getenv("EVIDENCE_DEADLINE", "8"))
+# Part of the deadline kept for snippet extension once the crawl has been cut off
+EVIDENCE_PARSE_BUDGET = float(os.getenv("EVIDENCE_PARSE_BUDGET", "1"))
+# Bulk retrieval: serper batches in flight, batch starts per second and retries of a failed batch
+BULK_CONCURRENCY = int(os.getenv("SERPER_BULK_CONCURRENCY", "4"))
+BULK_RATE_LIMIT = float(os.getenv("SERPER_BULK_RATE_LIMIT", "2"))
+BULK_MAX_RETRIES = int(os.getenv("SERPER_BULK_MAX_RETRIES", "3"))
+
+
+def _chunked(items: Iterable, size: int):
+    iterator = iter(items)
+    while batch := list(itertools.islice(iterator, size)):
+        yield batch
+
 
 class SerperEvidenceRetriever:
     def __init__(self, api_key: str):
         """Initialize the SerperEvidenceRetrieve class"""
         self.lang = "en"
         self.serper_key = api_key
-        
-
-    def retrieve_evidence(self, claim_queries_dict, top_k: int = 3, snippet_extend_flag: bool = True):
+        self.dispatcher = SerperDispatcher(api_key)
+
+
+    async def retrieve_evidence(
+        self,
+        claim_queries_dict,
+        top_k: int = 3,
+        snippet_extend_flag: bool = True,
+        document_store=None,
+        serper_responses=None,
+        deadline: float = EVIDENCE_DEADLINE,
+    ):
         """Retrieve evidences for the given claims
 
         Args:
             claim_queries_dict (dict): a dictionary of claims and their corresponding queries.
             top_k (int, optional): the number of top relevant results to retrieve. Defaults to 3.
             snippet_extend_flag (bool, optional): whether to extend the snippet. Defaults to True.
+            document_store (DocumentStore, optional): store that crawled pages are read from and saved to.
+            serper_responses (list, optional): results of an earlier search_queries call for the same queries.
+            deadline (float, optional): seconds the crawl and snippet extension may take. Pages not
+                ready by then are cancelled and their evidence keeps the plain search snippet,
+                marked ``degraded``. Defaults to EVIDENCE_DEADLINE, 0 disables the deadline.
 
         Returns:
             dict: a dictionary of claims and their corresponding evidences.
         """
         logger.info("Collecting evidences ...")
         query_list = [y for x in claim_queries_dict.items() for y in x[1]]
-        evidence_list = self._retrieve_evidence_4_all_claim(
-            query_list=query_list, top_k=top_k, snippet_extend_flag=snippet_extend_flag
+        evidence_list = await self._retrieve_evidence_4_all_claim(
+            query_list=query_list,
+            top_k=top_k,
+            snippet_extend_flag=snippet_extend_flag,
+            document_store=document_store,
+            serper_responses=serper_responses,
+            deadline=deadline,
         )
 
         i = 0
@@ -216,8 +117,14 @@ class SerperEvidenceRetriever:
 
         return claim_evidence_dict
 
-    def _retrieve_evidence_4_all_claim(
-        self, query_list: list[str], top_k: int = 3, snippet_extend_flag: bool = True
+    async def _retrieve_evidence_4_all_claim(
+        self,
+        query_list: list[str],
+        top_k: int = 3,
+        snippet_extend_flag: bool = True,
+        document_store=None,
+        serper_responses=None,
+        deadline: float = None,
     ) -> list[list[str]]:
         """Retrieve evidences for the given queries
 
@@ -225,6 +132,9 @@ class SerperEvidenceRetriever:
             query_list (list[str]): a list of queries to retrieve evidences for.
             top_k (int, optional): the number of top relevant results to retrieve. Defaults to 3.
             snippet_extend_flag (bool, optional): whether to extend the snippet. Defaults to True.
+            document_store (DocumentStore, optional): store that crawled pages are read from and saved to.
+            serper_responses (list, optional): results of an earlier search_queries call for the same queries.
+            deadline (float, optional): seconds the crawl and snippet extension may take.
 
         Returns:
             list[list[]]: a list of [a list of evidences for each given query].
@@ -234,15 +144,8 @@ class SerperEvidenceRetriever:
         evidences = [[] for _ in query_list]
 
         # get the response from serper
-        serper_responses = []
-        for i in range(0, len(query_list), 100):
-            batch_query_list = query_list[i : i + 100]
-            batch_response = self._request_serper_api(batch_query_list)
-            if batch_response is None:
-                logger.error("Serper API request error!")
-                return evidences
-            else:
-                serper_responses += batch_response.json()
+        if serper_responses is None:
+            serper_responses = await self.search_queries(query_list)
 
         # get the responses for queries with an answer box
         query_url_dict = {}
@@ -252,6 +155,14 @@ class SerperEvidenceRetriever:
             if query != response.get("searchParameters").get("q"):
                 logger.error("Serper change query from {} TO {}".format(query, response.get("searchParameters").get("q")))
 
+            # Passages from the local index are already extracted summaries, there is nothing to crawl
+            if response.get("local"):
+                evidences[i] = [
+                    {"text": _result["snippet"], "url": _result["link"], "local": True}
+                    for _result in response.get("organic", [])[:top_k]
+                ]
+                continue
+
             # TODO: provide the link for the answer box
             if "answerBox" in response:
                 if "answer" in response["answerBox"]:
@@ -288,95 +199,195 @@ class SerperEvidenceRetriever:
             return evidences
 
         # crawl web for queries without answer box
-        responses = crawl_web(query_url_dict)
+        loop = asyncio.get_running_loop()
+        expires_at = loop.time() + deadline if deadline else None
+        crawl_timeout = deadline - min(EVIDENCE_PARSE_BUDGET, deadline / 2) if deadline else None
+        responses = await crawl_web(query_url_dict, document_store, timeout=crawl_timeout)
         # Get extended snippets based on the snippet from serper
         flag_to_check = [_item[0] for _item in responses]
         response_to_check = [_item[1] for _item in responses]
         url_to_check = [_item[2] for _item in responses]
         query_to_check = [_item[3] for _item in responses]
 
-        def bs4_parse_text(response, snippet, flag):
-            """Parse the text from the response and extend the snippet
-
-            Args:
-                response (web response): the response from the web
-                snippet (str): the snippet to extend from the search result
-                flag (bool): flag to extend the snippet
-
-            Returns:
-                _type_: _description_
-            """
+        # Each page is parsed once, on the parse pool, for all of its snippets; PDFs and failed fetches keep their snippet
+        page_snippets = {}
+        for i, (flag, response) in enumerate(zip(flag_to_check, response_to_check)):
             if flag and ".pdf" not in str(response.url):
-                soup = bs4.BeautifulSoup(response.text, "html.parser")
-                text = soup.get_text()
-                # Search for the snippet in text
-                snippet_start = text.find(snippet[:-10])
-                if snippet_start == -1:
-                    return snippet
-                else:
-                    pre_context_range = 0  # Number of characters around the snippet to display
-                    post_context_range = 500  # Number of characters around the snippet to display
-                    start = max(0, snippet_start - pre_context_range)
-                    end = snippet_start + len(snippet) + post_context_range
-                    return text[start:end] + " ..."
-            else:
-                return snippet
-
-        # Question: if os.cpu_count() cause problems when running in parallel?
-        with ThreadPoolExecutor(max_workers=os.cpu_count()) as executor:
-            _extended_snippet = list(
-                executor.map(
-                    lambda _r, _s, _f: bs4_parse_text(_r, _s, _f),
-                    response_to_check,
-                    _snippet_to_check,
-                    flag_to_check,
-                )
+                page_snippets.setdefault(str(response.url), (response, []))[1].append(i)
+        _extended_snippet = list(_snippet_to_check)
+        # Pages cancelled by the deadline keep their plain snippet and are reported as degraded
+        _degraded = [flag is None for flag in flag_to_check]
+        try:
+            extended = await asyncio.wait_for(
+                parse_map(
+                    extend_snippets,
+                    [response.text.encode("utf-8") for response, _ in page_snippets.values()],
+                    [[_snippet_to_check[i] for i in indices] for _, indices in page_snippets.values()],
+                ),
+                timeout=max(expires_at - loop.time(), 0) if expires_at is not None else None,
             )
+        except asyncio.TimeoutError:
+            logger.error("Evidence deadline passed before snippets were extended")
+            extended = [None] * len(page_snippets)
+        for (_, indices), snippets in zip(page_snippets.values(), extended):
+            for j, i in enumerate(indices):
+                if snippets is None:
+                    _degraded[i] = True
+                else:
+                    _extended_snippet[i] = snippets[j]
 
         # merge the snippets by query
         query_snippet_url_dict = {}
-        for _query, _url, _snippet in zip(query_to_check, url_to_check, _extended_snippet):
+        for _query, _url, _snippet, _is_degraded in zip(query_to_check, url_to_check, _extended_snippet, _degraded):
             _snippet_url_list = query_snippet_url_dict.get(_query, [])
-            _snippet_url_list.append((_snippet, _url))
+            _snippet_url_list.append((_snippet, _url, _is_degraded))
             query_snippet_url_dict[_query] = _snippet_url_list
 
         # extend the evidence list for each query
+        query_index = {}
+        for i, query in enumerate(query_list):
+            query_index.setdefault(query, i)
         for _query in query_snippet_url_dict.keys():
-            _query_index = query_list.index(_query)
+            _query_index = query_index[_query]
             _snippet_url_list = query_snippet_url_dict[_query]
             evidences[_query_index] += [
-                {"text": re.sub(r"\n+", "\n", snippet), "url": _url} for snippet, _url in _snippet_url_list
+                {"text": re.sub(r"\n+", "\n", snippet), "url": _url, **({"degraded": True} if _is_degraded else {})}
+                for snippet, _url, _is_degraded in _snippet_url_list
             ]
 
         return evidences
 
-    def _request_serper_api(self, questions):
-        """Request the serper api
+    async def search_queries(self, query_list: list[str], use_cache: bool = True):
+        """Search all queries, on the local evidence index first and on serper for the rest
+
+        Queries are handed to the shared dispatcher, which batches them with those of
+        concurrent requests and serves repeated queries from its cache. Results answered
+        from the local index carry ``"local": True``; in offline mode serper is never called.
 
         Args:
-            questions (list): a list of questions to request the serper api.
+            query_list (list[str]): a list of queries to search for.
+            use_cache (bool, optional): batch with other callers and use the query cache.
+                Bulk runs pass False to send their own requests and leave the cache alone.
 
         Returns:
-            web response: the response from the serper api
+            list[dict]: the serper result of each query.
+
+        Raises:
+            Exception: the serper request error, if a batch carrying one of the queries failed.
         """
-        url = "https://google.serper.dev/search"
+        serper_responses = [None] * len(query_list)
+        local_index = get_local_index()
+        if local_index is not None:
+            # SQLite queries, kept off the event loop
+            lookups = await asyncio.to_thread(lambda: [local_index.lookup(query) for query in query_list])
+            for i, (query, hits) in enumerate(zip(query_list, lookups)):
+                if hits is not None:
+                    serper_responses[i] = {
+                        "searchParameters": {"q": query},
+                        "organic": [{"title": hit["title"], "link": hit["url"], "snippet": hit["text"]} for hit in hits],
+                        "local": True,
+                    }
+
+        remote = [i for i, response in enumerate(serper_responses) if response is None]
+        if remote:
+            logger.info("Searching {} of {} queries on serper".format(len(remote), len(query_list)))
+            remote_queries = [query_list[i] for i in remote]
+            if use_cache:
+                results = await self.dispatcher.search(remote_queries)
+            else:
+                results = await self.dispatcher.search_uncached(remote_queries)
+            for i, result in zip(remote, results):
+                serper_responses[i] = result
+        return serper_responses
+
+    async def retrieve_evidence_bulk(
+        self,
+        queries: Iterable[str],
+        batch_size: int = SERPER_MAX_BATCH,
+        concurrency: int = BULK_CONCURRENCY,
+        max_retries: int = BULK_MAX_RETRIES,
+        top_k: int = 3,
+        snippet_extend_flag: bool = True,
+        deadline: float = EVIDENCE_DEADLINE,
+    ) -> AsyncIterator[Tuple[str, Optional[list[dict]]]]:
+        """Retrieve evidence for a large stream of queries, yielding ``(query, evidences)`` as batches finish
+
+        Queries are read lazily and searched ``batch_size`` at a time, with up to
+        ``concurrency`` batches in flight and batch starts spaced by BULK_RATE_LIMIT, so
+        memory does not grow with the number of queries. A failing batch is retried on
+        its own with exponential backoff; if it keeps failing, or its crawl fails, its
+        queries are yielded with ``None`` evidence and the other batches carry on. Bulk
+        queries bypass the serper query cache so they do not evict interactive entries.
+        Meant for re-verifying the whole fact-check collection.
+
+        Args:
+            queries (iterable[str]): queries to retrieve evidence for, may be a generator.
+            batch_size (int, optional): queries per serper request, at most 100.
+            concurrency (int, optional): batches searched and crawled at the same time.
+            max_retries (int, optional): retries of a failed batch before giving up on it.
+            top_k (int, optional): the number of top relevant results to retrieve. Defaults to 3.
+            snippet_extend_flag (bool, optional): whether to extend the snippet. Defaults to True.
+            deadline (float, optional): seconds the crawl and snippet extension of one batch may take.
 
-        headers = {
-            "X-API-KEY": self.serper_key,
-            "Content-Type": "application/json",
-        }
+        Yields:
+            tuple: a query and its list of evidences, or None if its batch failed, in completion order.
+        """
+        limiter = RateLimiter(BULK_RATE_LIMIT)
+
+        async def run_batch(batch):
+            for attempt in range(max_retries + 1):
+                await limiter.wait()
+                try:
+                    serper_responses = await self.search_queries(batch, use_cache=False)
+                    break
+                except Exception as e:
+                    if attempt == max_retries:
+                        logger.error("Giving up on a bulk batch of {} queries: {}".format(len(batch), e))
+                        return batch, [None] * len(batch)
+                    await asyncio.sleep(2 ** attempt)
+            # A store per batch, so crawled pages are not kept for the whole run
+            document_store = DocumentStore(disk_cache=get_disk_document_cache())
+            try:
+                evidences = await self._retrieve_evidence_4_all_claim(
+                    query_list=batch,
+                    top_k=top_k,
+                    snippet_extend_flag=snippet_extend_flag,
+                    document_store=document_store,
+                    serper_responses=serper_responses,
+                    deadline=deadline,
+                )
+            except Exception as e:
+                logger.error("Error retrieving evidence for a bulk batch of {} queries: {}".format(len(batch), e))
+                return batch, [None] * len(batch)
+            return batch, evidences
+
+        batches = _chunked(queries, min(batch_size, SERPER_MAX_BATCH))
+        in_flight = set()
+        try:
+            while True:
+                for batch in itertools.islice(batches, concurrency - len(in_flight)):
+                    in_flight.add(asyncio.ensure_future(run_batch(batch)))
+                if not in_flight:
+                    return
+                done, in_flight = await asyncio.wait(in_flight, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    batch, evidences = task.result()
+                    for query, query_evidences in zip(batch, evidences):
+                        yield query, query_evidences
+        finally:
+            for task in in_flight:
+                task.cancel()
+
+    async def _request_serper_api(self, questions):
+        """Request the serper api
 
-        questions_data = [{"q": question, "autocorrect": False} for question in questions]
-        payload = json.dumps(questions_data)
-        response = None
-        response = requests.request("POST", url, headers=headers, data=payload)
+        Args:
+            questions (list): a list of questions to request the serper api.
 
-        if response.status_code == 200:
-            return response
-        elif response.status_code == 403:
-            raise Exception("Failed to authenticate. Check your API key.")
-        else:
-            raise Exception(f"Error occurred: {response.text}")
+        Returns:
+            web response: the response from the serper api
+        """
+        return await request_serper_api(self.serper_key, questions)
 
 
 if __name__ == "__main__":
@@ -389,5 +400,5 @@ if __name__ == "__main__":
     api_config = {"SERPER_API_KEY": args.serper_api_key}
     retriever = SerperEvidenceRetriever(api_config)
 
-    result = retriever._request_serper_api(["Apple", "IBM"])
+    result = asyncio.run(retriever._request_serper_api(["Apple", "IBM"]))
     #print(result.json())
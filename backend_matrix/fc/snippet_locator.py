@@ -0,0 +1,128 @@
+import re
+import unicodedata
+from collections import Counter, defaultdict
+from typing import Dict, List, Optional, Tuple
+
+from .text_extraction import extract_text
+
+
+# Word n-grams used as exact anchors; shorter runs are too common to place a snippet
+ANCHOR_SIZE = 3
+# Share of a snippet's words that must line up for the word-level fuzzy fallback
+FUZZY_MIN_SHARE = 0.5
+
+_WORD = re.compile(r"\w+")
+# Search engines join non-adjacent passages of a page with an ellipsis
+_ELISION = re.compile(r"\.\.\.|\u2026")
+
+
+def _normalize(text: str) -> str:
+    # Compatibility-decompose and drop accents so "Café" and "Cafe" compare equal
+    decomposed = unicodedata.normalize("NFKD", text)
+    return "".join(c for c in decomposed if not unicodedata.combining(c)).casefold()
+
+
+def _words(text: str) -> List[str]:
+    return _WORD.findall(_normalize(text))
+
+
+class SnippetLocator:
+    def __init__(self, text: str):
+        """Finds search-result snippets in a page's text.
+
+        The page is normalized (NFKD without accents, casefolded, punctuation and whitespace ignored)
+        and indexed once; each snippet is then placed by voting over the page positions
+        of its word n-grams, so whitespace, Unicode or small wording differences, and
+        Serper's "..." elisions, do not prevent a match. If no n-gram matches, single
+        words are used as a fuzzy fallback.
+
+        Args:
+            text (str): the visible text of the page.
+        """
+        self.text = text
+        # Character span of each word of the page, in the original text
+        self._spans: List[Tuple[int, int]] = []
+        self._words: List[str] = []
+        words = self._words
+        for match in _WORD.finditer(text):
+            for word in _WORD.findall(_normalize(match.group())):
+                words.append(word)
+                self._spans.append(match.span())
+        self._anchors: Dict[tuple, List[int]] = defaultdict(list)
+        self._positions: Dict[str, List[int]] = defaultdict(list)
+        for i, word in enumerate(words):
+            self._positions[word].append(i)
+            if i + ANCHOR_SIZE <= len(words):
+                self._anchors[tuple(words[i : i + ANCHOR_SIZE])].append(i)
+
+    def _vote(self, index: Dict, keys: List, min_votes: int) -> Optional[int]:
+        votes = Counter()
+        for offset, key in enumerate(keys):
+            positions = index.get(key, ())
+            # Very common words or phrases say little about where the snippet is
+            if 0 < len(positions) <= 50:
+                votes.update(position - offset for position in positions)
+        if not votes:
+            return None
+        start, count = votes.most_common(1)[0]
+        return max(start, 0) if count >= min_votes else None
+
+    def locate(self, snippet: str) -> Optional[Tuple[int, int]]:
+        """Return the ``(start, end)`` character span of ``snippet`` in the page text, or None.
+
+        For elided snippets this is the span of the best placed passage: passages placed
+        by an n-gram anchor win over fuzzy ones, then the one with the most matched words.
+        """
+        matches = [match for match in map(self._locate_passage, _ELISION.split(snippet)) if match is not None]
+        if not matches:
+            return None
+        # max() keeps the earliest of equally good passages
+        return max(matches, key=lambda match: match[:2])[2]
+
+    def _locate_passage(self, passage: str) -> Optional[Tuple[bool, int, Tuple[int, int]]]:
+        """Return ``(anchored, matched words, span)`` for one passage of a snippet, or None."""
+        words = _words(passage)
+        if not words or not self._spans:
+            return None
+        grams = [tuple(words[i : i + ANCHOR_SIZE]) for i in range(len(words) - ANCHOR_SIZE + 1)]
+        start = self._vote(self._anchors, grams, 1) if grams else None
+        anchored = start is not None
+        if start is None:
+            start = self._vote(self._positions, words, max(2, int(len(words) * FUZZY_MIN_SHARE)))
+        if start is None:
+            return None
+        # Trim words of the snippet that are not on the page, such as a leading date
+        matched = [
+            start + i for i, word in enumerate(words) if start + i < len(self._words) and self._words[start + i] == word
+        ]
+        if not matched:
+            return None
+        return anchored, len(matched), (self._spans[matched[0]][0], self._spans[matched[-1]][1])
+
+    def extend(self, snippet: str, post_context: int = 500) -> str:
+        """``snippet`` as it appears on the page followed by ``post_context`` characters, or ``snippet`` if not found."""
+        span = self.locate(snippet)
+        if span is None:
+            return snippet
+        return self.text[span[0] : span[1] + post_context] + " ..."
+
+
+def extend_snippets(html: bytes, snippets: List[str], post_context: int = 500) -> List[str]:
+    """Extend every snippet found on one page with the text that follows it.
+
+    Meant to run in the parse pool, so it takes the page as raw bytes and parses it once
+    for all of its snippets.
+
+    Args:
+        html (bytes): the page source, UTF-8 encoded.
+        snippets (list[str]): snippets returned by the search engine for this page.
+        post_context (int, optional): number of characters kept after each snippet. Defaults to 500.
+
+    Returns:
+        list[str]: the extended snippets; snippets not found on the page are returned unchanged.
+    """
+    try:
+        locator = SnippetLocator(extract_text(html.decode("utf-8", errors="replace")))
+    except Exception:
+        return list(snippets)
+    return [locator.extend(snippet, post_context) for snippet in snippets]
@@ -0,0 +1,125 @@
+import asyncio
+import os
+from typing import Awaitable, Callable, Dict, List, Optional
+from urllib.parse import urlparse
+
+from .kv_store import TTLStore
+
+
+SOURCE_CREDIBILITY_TTL = float(os.getenv("SOURCE_CREDIBILITY_TTL", str(7 * 24 * 3600)))
+# How long an expired rating may still be served while it is refreshed in the background
+SOURCE_CREDIBILITY_STALE_TTL = float(os.getenv("SOURCE_CREDIBILITY_STALE_TTL", str(30 * 24 * 3600)))
+
+
+def domain_key(url_or_netloc: str) -> str:
+    """Lowercased netloc without a leading ``www.``, so reuters.com and www.reuters.com share a rating."""
+    netloc = urlparse(url_or_netloc).netloc if "://" in url_or_netloc else url_or_netloc
+    netloc = netloc.lower()
+    return netloc[4:] if netloc.startswith("www.") else netloc
+
+
+class DomainCredibilityStore:
+    def __init__(
+        self,
+        rate_domains: Callable[[List[str]], Awaitable[List[Dict]]],
+        ttl: float = SOURCE_CREDIBILITY_TTL,
+        stale_ttl: float = SOURCE_CREDIBILITY_STALE_TTL,
+    ):
+        """Persistent per-domain credibility ratings.
+
+        Only domains without a rating are sent to ``rate_domains``, all of them in one
+        call, and concurrent lookups of the same domains share that call. Ratings are
+        matched to domains by their ``source``; domains left out of the reply stay
+        unrated. Expired ratings are still served and refreshed in the background.
+
+        Args:
+            rate_domains (callable): coroutine rating a list of domains, returning one dict per domain.
+            ttl (float): seconds a rating is considered fresh.
+            stale_ttl (float): extra seconds an expired rating is served while being refreshed.
+        """
+        self.rate_domains = rate_domains
+        self.store = TTLStore("source_credibility", ttl=ttl, stale_ttl=stale_ttl)
+        self._refreshing = set()
+        self._background_tasks = set()
+        # domain -> task rating it, shared by concurrent lookups
+        self._in_flight: Dict[str, asyncio.Task] = {}
+
+    async def lookup(self, domains: List[str]) -> Dict[str, Dict]:
+        """Return ``{domain: rating}`` for the given domains, rating unknown ones on the spot."""
+        ratings = {}
+        missing = []
+        stale = []
+        keys = list(dict.fromkeys(domain_key(d) for d in domains if d))
+        # SQLite reads happen in a thread, off the event loop
+        entries = await asyncio.to_thread(lambda: [self.store.get_entry(domain) for domain in keys])
+        for domain, entry in zip(keys, entries):
+            if entry is None:
+                missing.append(domain)
+                continue
+            ratings[domain], age = entry
+            if age > self.store.ttl:
+                stale.append(domain)
+
+        if missing:
+            ratings.update(await self._rate_shared(missing))
+
+        stale = [domain for domain in stale if domain not in self._refreshing]
+        if stale:
+            self._refreshing.update(stale)
+            task = asyncio.ensure_future(self._refresh(stale))
+            self._background_tasks.add(task)
+            task.add_done_callback(self._background_tasks.discard)
+        return ratings
+
+    async def _rate_shared(self, domains: List[str]) -> Dict[str, Dict]:
+        """``_rate`` the domains, joining calls already rating some of them."""
+        new = [domain for domain in domains if domain not in self._in_flight]
+        if new:
+            task = asyncio.ensure_future(self._rate(new))
+            for domain in new:
+                self._in_flight[domain] = task
+            task.add_done_callback(lambda t: self._on_rated(new, t))
+        tasks = list(dict.fromkeys(self._in_flight[domain] for domain in domains))
+        # Shielded because a task may be shared with other callers
+        results = await asyncio.gather(*(asyncio.shield(task) for task in tasks))
+        rated = {}
+        for result in results:
+            rated.update(result)
+        return {domain: rated[domain] for domain in domains if domain in rated}
+
+    def _on_rated(self, domains: List[str], task: asyncio.Task):
+        for domain in domains:
+            if self._in_flight.get(domain) is task:
+                del self._in_flight[domain]
+        # Nobody may be left to read the error if every caller was cancelled
+        if not task.cancelled():
+            task.exception()
+
+    async def _rate(self, domains: List[str]) -> Dict[str, Dict]:
+        ratings = await self.rate_domains(domains)
+        by_source = {domain_key(str(rating.get("source", ""))): rating for rating in ratings}
+        rated = {}
+        for domain in domains:
+            # Positions are not trusted: the model may drop or reorder entries
+            rating = by_source.get(domain)
+            if rating is None:
+                continue
+            rating = {**rating, "source": domain}
+            rating.pop("url", None)
+            rated[domain] = rating
+        if rated:
+            await asyncio.to_thread(self.store.set_many, list(rated.items()))
+        return rated
+
+    async def _refresh(self, domains: List[str]):
+        try:
+            await self._rate(domains)
+        except Exception as e:
+            print(f"Error refreshing source credibility for {domains}: {str(e)}")
+        finally:
+            self._refreshing.difference_update(domains)
+
+    def get(self, domain: str) -> Optional[Dict]:
+        """Stored rating of ``domain``; blocks on SQLite, so call it from a thread."""
+        entry = self.store.get_entry(domain_key(domain))
+        return entry[0] if entry is not None else None
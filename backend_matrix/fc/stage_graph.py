@@ -0,0 +1,58 @@
+import asyncio
+import time
+from typing import Any, Awaitable, Callable, Dict, Iterable
+
+
+class StageGraph:
+    def __init__(self):
+        """Small dependency graph of async pipeline stages.
+
+        Every stage starts as soon as the stages it depends on have finished, so the
+        overall latency is bounded by the longest dependency chain rather than by the
+        sum of all stages. Per-stage timings are recorded in ``timings``.
+        """
+        self._stages: Dict[str, tuple] = {}
+        self.timings: Dict[str, Dict[str, float]] = {}
+
+    def add(self, name: str, fn: Callable[..., Awaitable[Any]], deps: Iterable[str] = ()):
+        """Register a stage.
+
+        Args:
+            name (str): stage name, also the keyword its result is passed to dependents under.
+            fn (callable): coroutine function called with the results of ``deps`` as keyword arguments.
+            deps (iterable[str], optional): stages that must finish before this one starts.
+        """
+        deps = tuple(deps)
+        for dep in deps:
+            if dep not in self._stages:
+                raise ValueError(f"Stage {name!r} depends on unknown stage {dep!r}")
+        self._stages[name] = (fn, deps)
+        return self
+
+    async def _run_stage(self, name: str, started_at: float, tasks: Dict[str, asyncio.Task]):
+        fn, deps = self._stages[name]
+        dep_results = await asyncio.gather(*(tasks[dep] for dep in deps))
+        start = time.perf_counter()
+        try:
+            return await fn(**dict(zip(deps, dep_results)))
+        finally:
+            end = time.perf_counter()
+            self.timings[name] = {
+                "start_ms": round((start - started_at) * 1000, 1),
+                "duration_ms": round((end - start) * 1000, 1),
+            }
+
+    async def run(self) -> Dict[str, Any]:
+        """Run all stages and return ``{stage: result}``; the first failing stage cancels the rest."""
+        started_at = time.perf_counter()
+        tasks: Dict[str, asyncio.Task] = {}
+        # Stages can only depend on earlier ones, so insertion order is a topological order
+        for name in self._stages:
+            tasks[name] = asyncio.ensure_future(self._run_stage(name, started_at, tasks))
+        try:
+            results = await asyncio.gather(*tasks.values())
+        except BaseException:
+            for task in tasks.values():
+                task.cancel()
+            raise
+        return dict(zip(tasks.keys(), results))
@@ -0,0 +1,127 @@
+import os
+import re
+from typing import List
+
+import numpy as np
+from scipy import sparse
+
+
+# "newspaper" keeps Article.nlp(); "textrank" uses summarize() below and skips keyword extraction
+ARTICLE_SUMMARIZER = os.getenv("ARTICLE_SUMMARIZER", "newspaper").lower()
+SUMMARY_SENTENCES = 5
+TEXTRANK_DAMPING = 0.85
+TEXTRANK_ITERATIONS = 50
+TEXTRANK_TOLERANCE = 1e-6
+
+_SENTENCE_END = re.compile(r"(?<=[.!?])[\"'”’)]*\s+(?=[\"'“‘(]*[A-Z0-9])")
+# A period after these does not end the sentence. Single initials are left out: "Plan B." or
+# "Vitamin D." end sentences more often than a middle initial continues one
+_ABBREVIATION = re.compile(
+    r"(?:\b(?:Mr|Mrs|Ms|Dr|Prof|St|Sr|Jr|Gov|Sen|Rep|Gen|Col|Lt|Sgt|Capt|Rev|Inc|Corp|Co|Ltd|No|vs|etc)"
+    r"|\b(?:[A-Za-z]\.)+[A-Za-z])\.$"
+)
+_WORD = re.compile(r"[^\W\d_]{2,}")
+# Function words would make unrelated sentences look similar
+_STOPWORDS = frozenset(
+    "about after also an and any are as at be been before but by can could did do does for from had has have he "
+    "her his how if in into is it its more most not of on one or our out over said she so some than that the "
+    "their them then there these they this to up was we were what when where which while who will with would "
+    "you".split()
+)
+
+
+def split_sentences(text: str) -> List[str]:
+    """Sentences of ``text``, splitting paragraphs first and then on sentence-ending punctuation."""
+    sentences = []
+    for paragraph in text.splitlines():
+        pending = ""
+        for piece in _SENTENCE_END.split(paragraph):
+            pending = f"{pending} {piece.strip()}" if pending else piece.strip()
+            if pending and not _ABBREVIATION.search(pending):
+                sentences.append(pending)
+                pending = ""
+        if pending:
+            sentences.append(pending)
+    return sentences
+
+
+def _terms(sentence: str) -> List[str]:
+    return [word for word in _WORD.findall(sentence.casefold()) if word not in _STOPWORDS]
+
+
+def _tfidf(documents: List[List[str]], vocabulary: dict) -> sparse.csr_matrix:
+    """L2-normalized TF-IDF rows for tokenized documents, growing ``vocabulary`` with unseen terms."""
+    rows, cols = [], []
+    for i, terms in enumerate(documents):
+        for term in terms:
+            rows.append(i)
+            cols.append(vocabulary.setdefault(term, len(vocabulary)))
+    counts = sparse.csr_matrix(
+        (np.ones(len(rows)), (rows, cols)), shape=(len(documents), max(len(vocabulary), 1))
+    )
+    counts.sum_duplicates()
+    document_frequency = np.bincount(counts.indices, minlength=counts.shape[1])
+    idf = np.log((1 + len(documents)) / (1 + document_frequency)) + 1
+    weighted = counts.multiply(idf).tocsr()
+    norms = np.sqrt(np.asarray(weighted.multiply(weighted).sum(axis=1)).ravel())
+    norms[norms == 0] = 1
+    return sparse.diags(1 / norms) @ weighted
+
+
+def rank_sentences(sentences: List[str], title: str = "") -> np.ndarray:
+    """TextRank score of every sentence, by power iteration over TF-IDF cosine similarities.
+
+    The random jump favours sentences similar to ``title``, as newspaper's scoring does.
+    """
+    n = len(sentences)
+    vocabulary = {}
+    matrix = _tfidf([_terms(sentence) for sentence in sentences], vocabulary)
+    similarity = (matrix @ matrix.T).tocsr()
+    similarity.setdiag(0)
+    similarity.eliminate_zeros()
+
+    # Row-stochastic transitions; sentences similar to nothing jump uniformly
+    out_weight = np.asarray(similarity.sum(axis=1)).ravel()
+    dangling = out_weight == 0
+    out_weight[dangling] = 1
+    transition = (sparse.diags(1 / out_weight) @ similarity).T.tocsr()
+
+    jump = np.ones(n)
+    title_terms = _terms(title)
+    if title_terms:
+        title_vector = _tfidf([title_terms], vocabulary)
+        title_vector.resize((1, matrix.shape[1]))
+        jump += np.asarray((matrix @ title_vector.T).todense()).ravel()
+    jump /= jump.sum()
+
+    scores = np.full(n, 1 / n)
+    for _ in range(TEXTRANK_ITERATIONS):
+        updated = TEXTRANK_DAMPING * (transition @ scores + scores[dangling].sum() / n) + (1 - TEXTRANK_DAMPING) * jump
+        converged = np.abs(updated - scores).sum() < TEXTRANK_TOLERANCE
+        scores = updated
+        if converged:
+            break
+    return scores
+
+
+def summarize(text: str, title: str = "", max_sentences: int = SUMMARY_SENTENCES) -> str:
+    """Extractive summary of an article: its ``max_sentences`` most central sentences in reading order.
+
+    A drop-in for ``Article.summary`` (sentences joined with newlines) that needs no
+    NLTK data and scores all sentences at once on a sparse sentence x term matrix.
+
+    Args:
+        text (str): the article text.
+        title (str, optional): the article title, used to favour on-topic sentences.
+        max_sentences (int, optional): number of sentences kept. Defaults to SUMMARY_SENTENCES.
+
+    Returns:
+        str: the summary, one sentence per line.
+    """
+    sentences = split_sentences(text)
+    if len(sentences) <= max_sentences:
+        return "\n".join(sentences)
+    scores = rank_sentences(sentences, title)
+    # Stable on ties, so earlier sentences win as in the lead of a news story
+    best = np.argsort(-scores, kind="stable")[:max_sentences]
+    return "\n".join(sentences[i] for i in sorted(best))
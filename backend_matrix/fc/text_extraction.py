@@ -0,0 +1,106 @@
+import os
+from typing import Callable, Dict
+
+import bs4
+
+try:
+    import lxml.etree
+    import lxml.html
+except ImportError:
+    lxml = None
+
+try:
+    from selectolax.lexbor import LexborHTMLParser
+except ImportError:
+    LexborHTMLParser = None
+
+
+# Text under these tags is never shown to a reader
+INVISIBLE_TAGS = ["style", "script", "head", "title", "meta"]
+# auto picks the fastest installed backend: selectolax, then lxml, then bs4
+TEXT_EXTRACTION_BACKEND = os.getenv("TEXT_EXTRACTION_BACKEND", "auto")
+
+
+def is_tag_visible(element: bs4.element) -> bool:
+    """Determines if an HTML element is visible.
+
+    Args:
+        element: A BeautifulSoup element to check the visibility of.
+    returns:
+        Whether the element is visible.
+    """
+    if element.parent.name in INVISIBLE_TAGS + ["[document]"] or isinstance(element, bs4.element.Comment):
+        return False
+    return True
+
+
+def _bs4_text(html: str) -> str:
+    soup = bs4.BeautifulSoup(html, "html.parser")
+    texts = soup.findAll(text=True)
+    # Filter out invisible text from the page.
+    visible_text = filter(is_tag_visible, texts)
+    return " ".join(" ".join(t.strip() for t in visible_text).split())
+
+
+def _lxml_text(html: str) -> str:
+    try:
+        root = lxml.html.document_fromstring(html)
+    except ValueError:
+        # Strings carrying an XML encoding declaration have to be parsed as bytes
+        root = lxml.html.document_fromstring(html.encode("utf-8"))
+    except lxml.etree.ParserError:
+        # Empty or whitespace-only document
+        return ""
+    lxml.etree.strip_elements(root, lxml.etree.Comment, lxml.etree.ProcessingInstruction, *INVISIBLE_TAGS, with_tail=False)
+    return " ".join(" ".join(root.itertext()).split())
+
+
+def _selectolax_text(html: str) -> str:
+    tree = LexborHTMLParser(html)
+    tree.strip_tags(INVISIBLE_TAGS)
+    if tree.root is None:
+        return ""
+    return " ".join(tree.root.text(separator=" ").split())
+
+
+BACKENDS: Dict[str, Callable[[str], str]] = {"bs4": _bs4_text}
+if lxml is not None:
+    BACKENDS["lxml"] = _lxml_text
+if LexborHTMLParser is not None:
+    BACKENDS["selectolax"] = _selectolax_text
+
+
+def register_backend(name: str, extract: Callable[[str], str]):
+    """Make ``extract(html) -> text`` available under ``name``."""
+    BACKENDS[name] = extract
+
+
+def get_backend(name: str = None) -> Callable[[str], str]:
+    """Return the extraction function called ``name``, defaulting to TEXT_EXTRACTION_BACKEND."""
+    name = name or TEXT_EXTRACTION_BACKEND
+    if name == "auto":
+        for candidate in ("selectolax", "lxml", "bs4"):
+            if candidate in BACKENDS:
+                return BACKENDS[candidate]
+    if name not in BACKENDS:
+        raise ValueError(f"Unknown or unavailable text extraction backend {name!r}, available: {sorted(BACKENDS)}")
+    return BACKENDS[name]
+
+
+def extract_text(html: str, backend: str = None) -> str:
+    """Visible text of an HTML page as a single whitespace-normalized line.
+
+    Script, style and head content and comments are dropped, and the text of
+    separate elements is joined with a space.
+
+    Args:
+        html (str): the page source.
+        backend (str, optional): one of ``BACKENDS``, or "auto". Defaults to TEXT_EXTRACTION_BACKEND.
+
+    Returns:
+        str: the visible text.
+    """
+    if not html:
+        return ""
+    return get_backend(backend)(html)
+
@@ -0,0 +1,96 @@
+from urllib.parse import parse_qsl, urlencode, urlsplit, urlunsplit
+
+
+DEFAULT_PORTS = {"http": 80, "https": 443}
+
+
+def normalize_url(url: str) -> str:
+    """Normalizes a URL so that trivially different spellings share a cache key.
+
+    Lowercases the scheme and host, drops default ports and fragments, sorts the
+    query string and removes a trailing slash from non-root paths.
+
+    Args:
+        url: URL to normalize.
+    Returns:
+        The normalized URL, or the stripped input if it cannot be parsed.
+    """
+    url = url.strip()
+    try:
+        parts = urlsplit(url)
+        port = parts.port
+    except ValueError:
+        return url
+    scheme = parts.scheme.lower()
+    if not scheme or not parts.hostname:
+        return url
+
+    netloc = parts.hostname.lower()
+    if port and DEFAULT_PORTS.get(scheme) != port:
+        netloc = f"{netloc}:{port}"
+    if parts.username:
+        netloc = f"{parts.username}@{netloc}"
+
+    path = parts.path or "/"
+    if len(path) > 1 and path.endswith("/"):
+        path = path.rstrip("/")
+    query = urlencode(sorted(parse_qsl(parts.query, keep_blank_values=True)))
+    return urlunsplit((scheme, netloc, path, query, ""))
+
+
+# Query parameters that only track where a click came from
+TRACKING_PARAMS = frozenset({
+    "fbclid", "gclid", "dclid", "gbraid", "wbraid", "msclkid", "yclid", "twclid", "igshid",
+    "mc_cid", "mc_eid", "_ga", "_gl", "ref_src", "ref_url", "cmpid", "ocid", "smid", "ito",
+})
+TRACKING_PREFIXES = ("utm_", "pk_", "mtm_", "__twitter", "at_")
+# Query parameters that only request the AMP rendering of a page, with the values that do so
+AMP_PARAMS = {"amp": ("", "1", "true"), "outputtype": ("amp",)}
+
+
+def _is_tracking_param(name: str, value: str) -> bool:
+    name = name.lower()
+    if name in AMP_PARAMS:
+        return value.lower() in AMP_PARAMS[name]
+    return name in TRACKING_PARAMS or name.startswith(TRACKING_PREFIXES)
+
+
+def canonicalize_url(url: str) -> str:
+    """Maps the variants of one article URL onto a single key.
+
+    On top of normalize_url, drops tracking parameters (``utm_*``, ``fbclid``...),
+    a leading ``www.`` and AMP variants (``amp.`` hosts, a leading or trailing ``/amp``
+    path segment, ``.amp`` / ``.amp.html`` suffixes, ``?amp=1`` and ``?outputType=amp``).
+
+    Args:
+        url: URL to canonicalize.
+    Returns:
+        The canonical URL, or the stripped input if it cannot be parsed.
+    """
+    url = normalize_url(url)
+    parts = urlsplit(url)
+    if not parts.scheme or not parts.netloc:
+        return url
+
+    netloc = parts.netloc
+    for prefix in ("www.", "amp."):
+        if netloc.startswith(prefix) and netloc.count(".") > 1:
+            netloc = netloc[len(prefix):]
+
+    # "/amp/story" and "/story/amp"; an "amp" segment elsewhere is part of the article's path
+    segments = parts.path.split("/")
+    if len(segments) > 2 and segments[1].lower() == "amp":
+        del segments[1]
+    if len(segments) > 2 and segments[-1].lower() == "amp":
+        del segments[-1]
+    path = "/".join(segments) or "/"
+    lowered = path.lower()
+    for suffix in (".amp.html", ".amp"):
+        if lowered.endswith(suffix):
+            path = path[: -len(suffix)] + (".html" if suffix == ".amp.html" else "")
+            break
+    if len(path) > 1 and path.endswith("/"):
+        path = path.rstrip("/")
+
+    query = urlencode([(k, v) for k, v in parse_qsl(parts.query, keep_blank_values=True) if not _is_tracking_param(k, v)])
+    return urlunsplit((parts.scheme, netloc, path, query, ""))
@@ -1,8 +1,20 @@
 import requests
 import bs4
 import asyncio
-from httpx import AsyncHTTPTransport
-from httpx._client import AsyncClient
+import ipaddress
+import os
+import socket
+import time
+from urllib.parse import urlparse
+from typing import AsyncIterator, List, Optional
+
+import httpcore
+import httpx
+from httpx import AsyncClient
+
+from .document_store import Document
+from .local_index import FC_OFFLINE
+from .text_extraction import extract_text, is_tag_visible  # noqa: F401
 
 
 USER_AGENT = "Mozilla/5.0 (Macintosh; Intel Mac OS X 10.14; rv:65.0) Gecko/20100101 Firefox/65.0"
@@ -11,57 +23,304 @@ MOBILE_USER_AGENT = "Mozilla/5.0 (Linux; Android 7.0; SM-G930V Build/NRD90M) App
 headers = {"User-Agent": USER_AGENT}
 
 
-def is_tag_visible(element: bs4.element) -> bool:
-    """Determines if an HTML element is visible.
+CRAWL_TIMEOUT = float(os.getenv("CRAWL_TIMEOUT", "3"))
+CRAWL_RETRIES = int(os.getenv("CRAWL_RETRIES", "3"))
+CRAWL_MAX_CONNECTIONS = int(os.getenv("CRAWL_MAX_CONNECTIONS", "100"))
+CRAWL_MAX_KEEPALIVE = int(os.getenv("CRAWL_MAX_KEEPALIVE", "20"))
+CRAWL_KEEPALIVE_EXPIRY = float(os.getenv("CRAWL_KEEPALIVE_EXPIRY", "30"))
+CRAWL_HTTP2 = os.getenv("CRAWL_HTTP2", "false").lower() in ("1", "true", "yes")
+DNS_CACHE_TTL = float(os.getenv("DNS_CACHE_TTL", "300"))
+# At most this much of a page body is read, larger HTML pages are truncated
+CRAWL_MAX_BYTES = int(os.getenv("CRAWL_MAX_BYTES", str(2 * 1024 * 1024)))
+# Wall-clock budget for reading one body, on top of the per-read CRAWL_TIMEOUT
+CRAWL_READ_DEADLINE = float(os.getenv("CRAWL_READ_DEADLINE", "5"))
+# Never worth downloading to extract text from
+BINARY_EXTENSIONS = (
+    ".pdf", ".zip", ".gz", ".mp3", ".mp4", ".m4a", ".mov", ".avi", ".webm",
+    ".jpg", ".jpeg", ".png", ".gif", ".webp", ".doc", ".docx", ".xls", ".xlsx", ".ppt", ".pptx",
+)
 
-    Args:
-        element: A BeautifulSoup element to check the visibility of.
-    returns:
-        Whether the element is visible.
+
+class CachingDNSBackend(httpcore.AsyncNetworkBackend):
+    def __init__(self, backend: httpcore.AsyncNetworkBackend, ttl: float = DNS_CACHE_TTL):
+        """Network backend that resolves each host once per ``ttl`` seconds.
+
+        Every resolved address is cached and tried in order, so an unreachable address
+        falls back to the next one. TLS still verifies and sends SNI for the original
+        hostname, which httpcore passes to ``start_tls`` separately.
+        """
+        self._backend = backend
+        self._ttl = ttl
+        self._cache = {}
+
+    async def _resolve(self, host: str, port: int) -> List[str]:
+        try:
+            ipaddress.ip_address(host)
+            return [host]
+        except ValueError:
+            pass
+        cached = self._cache.get(host)
+        if cached is not None and cached[1] > time.monotonic():
+            return cached[0]
+        infos = await asyncio.get_running_loop().getaddrinfo(host, port, type=socket.SOCK_STREAM)
+        addresses = list(dict.fromkeys(info[4][0] for info in infos))
+        self._cache[host] = (addresses, time.monotonic() + self._ttl)
+        return addresses
+
+    async def connect_tcp(self, host, port, timeout=None, local_address=None, socket_options=None):
+        error = None
+        for address in await self._resolve(host, port):
+            try:
+                return await self._backend.connect_tcp(
+                    address, port, timeout=timeout, local_address=local_address, socket_options=socket_options
+                )
+            except Exception as e:
+                error = e
+        # The cached addresses may be stale, resolve again next time
+        self._cache.pop(host, None)
+        raise error
+
+    async def connect_unix_socket(self, path, timeout=None, socket_options=None):
+        return await self._backend.connect_unix_socket(path, timeout=timeout, socket_options=socket_options)
+
+    async def sleep(self, seconds: float):
+        await self._backend.sleep(seconds)
+
+
+def _to_httpx_error(error: Exception) -> Exception:
+    # httpcore and httpx name their transport errors alike (ConnectTimeout, ReadError...)
+    if isinstance(error, httpcore.TimeoutException):
+        return getattr(httpx, type(error).__name__, httpx.TimeoutException)(str(error))
+    if isinstance(error, (httpcore.NetworkError, httpcore.ProtocolError, httpcore.UnsupportedProtocol)):
+        return getattr(httpx, type(error).__name__, httpx.TransportError)(str(error))
+    return error
+
+
+class _ResponseStream(httpx.AsyncByteStream):
+    def __init__(self, stream):
+        self._stream = stream
+
+    async def __aiter__(self) -> AsyncIterator[bytes]:
+        try:
+            async for chunk in self._stream:
+                yield chunk
+        except Exception as e:
+            raise _to_httpx_error(e) from e
+
+    async def aclose(self):
+        if hasattr(self._stream, "aclose"):
+            await self._stream.aclose()
+
+
+class CachingDNSTransport(httpx.AsyncBaseTransport):
+    def __init__(self, limits: httpx.Limits, http2: bool = False, retries: int = 0):
+        """httpx transport over an httpcore connection pool that uses CachingDNSBackend.
+
+        Args:
+            limits (httpx.Limits): connection pool limits.
+            http2 (bool, optional): also offer HTTP/2; needs the h2 package.
+            retries (int, optional): connection retries.
+        """
+        self._pool = httpcore.AsyncConnectionPool(
+            ssl_context=httpx.create_ssl_context(),
+            max_connections=limits.max_connections,
+            max_keepalive_connections=limits.max_keepalive_connections,
+            keepalive_expiry=limits.keepalive_expiry,
+            http2=http2,
+            retries=retries,
+            network_backend=CachingDNSBackend(httpcore.AnyIOBackend()),
+        )
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        core_request = httpcore.Request(
+            method=request.method,
+            url=httpcore.URL(
+                scheme=request.url.raw_scheme,
+                host=request.url.raw_host,
+                port=request.url.port,
+                target=request.url.raw_path,
+            ),
+            headers=request.headers.raw,
+            content=request.stream,
+            extensions=request.extensions,
+        )
+        try:
+            response = await self._pool.handle_async_request(core_request)
+        except Exception as e:
+            raise _to_httpx_error(e) from e
+        return httpx.Response(
+            status_code=response.status,
+            headers=response.headers,
+            stream=_ResponseStream(response.stream),
+            extensions=response.extensions,
+        )
+
+    async def aclose(self):
+        await self._pool.aclose()
+
+
+def discard_async_client(client: Optional[AsyncClient], loop: Optional[asyncio.AbstractEventLoop]):
+    """Close a pooled client that was created on another event loop, without waiting for it."""
+    if client is None or client.is_closed:
+        return
+
+    async def close():
+        try:
+            await client.aclose()
+        except Exception as e:
+            print(f"Error closing HTTP client of a previous event loop: {str(e)}")
+
+    if loop is not None and loop.is_running() and loop is not asyncio.get_running_loop():
+        asyncio.run_coroutine_threadsafe(close(), loop)
+    else:
+        # Its loop is gone, close what can still be closed from here
+        task = asyncio.ensure_future(close())
+        _closing_tasks.add(task)
+        task.add_done_callback(_closing_tasks.discard)
+
+
+_closing_tasks = set()
+_crawler_client = None
+_crawler_loop = None
+
+
+def get_crawler_client() -> AsyncClient:
+    """Process-wide pooled client for crawling evidence pages.
+
+    Connections are kept alive and reused across requests; the client is rebuilt if
+    it is used from a different event loop than the one it was created on.
     """
-    if element.parent.name in [
-        "style",
-        "script",
-        "head",
-        "title",
-        "meta",
-        "[document]",
-    ] or isinstance(element, bs4.element.Comment):
-        return False
-    return True
+    global _crawler_client, _crawler_loop
+    loop = asyncio.get_running_loop()
+    if _crawler_client is None or _crawler_client.is_closed or _crawler_loop is not loop:
+        discard_async_client(_crawler_client, _crawler_loop)
+        http2 = CRAWL_HTTP2
+        if http2:
+            try:
+                import h2  # noqa: F401
+            except ImportError:
+                print("CRAWL_HTTP2 is set but the h2 package is not installed, falling back to HTTP/1.1")
+                http2 = False
+        limits = httpx.Limits(
+            max_connections=CRAWL_MAX_CONNECTIONS,
+            max_keepalive_connections=CRAWL_MAX_KEEPALIVE,
+            keepalive_expiry=CRAWL_KEEPALIVE_EXPIRY,
+        )
+        _crawler_client = AsyncClient(
+            transport=CachingDNSTransport(limits, http2=http2, retries=CRAWL_RETRIES),
+            headers=headers,
+            timeout=CRAWL_TIMEOUT,
+            follow_redirects=True,
+        )
+        _crawler_loop = loop
+    return _crawler_client
 
 
-transport = AsyncHTTPTransport(retries=3)
+async def close_crawler_client():
+    global _crawler_client
+    if _crawler_client is not None:
+        await _crawler_client.aclose()
+        _crawler_client = None
+
+
+def is_text_response(response) -> bool:
+    content_type = response.headers.get("content-type", "").lower()
+    return not content_type or "html" in content_type or "xml" in content_type or content_type.startswith("text/")
 
 
 async def httpx_get(url: str, headers: dict):
+    """Stream a page and return its decoded body as a Document.
+
+    Binary responses are rejected from their URL or headers before the body is read.
+    HTML bodies are cut off at CRAWL_MAX_BYTES or when CRAWL_READ_DEADLINE passes, and
+    the Document is then marked ``truncated``; other text types declared larger than
+    the cap are skipped.
+
+    Returns:
+        tuple: (True, Document) on success, (False, None) otherwise.
+    """
+    if urlparse(url).path.lower().endswith(BINARY_EXTENSIONS):
+        return False, None
     try:
-        async with AsyncClient(transport=transport) as client:
-            response = await client.get(url, headers=headers, timeout=3)
-            response = response if response.status_code == 200 else None
-            if not response:
+        client = get_crawler_client()
+        async with client.stream("GET", url, headers=headers) as response:
+            if response.status_code != 200 or not is_text_response(response):
+                return False, None
+            content_type = response.headers.get("content-type", "").lower()
+            content_length = response.headers.get("content-length", "")
+            if (
+                content_length.isdigit()
+                and int(content_length) > CRAWL_MAX_BYTES
+                and content_type
+                and "html" not in content_type
+            ):
                 return False, None
-            else:
-                return True, response
+
+            body = bytearray()
+            truncated = False
+            try:
+                # Also bounds a single stalled read, not only the time between chunks
+                async with asyncio.timeout(CRAWL_READ_DEADLINE):
+                    async for chunk in response.aiter_bytes():
+                        body += chunk
+                        if len(body) >= CRAWL_MAX_BYTES:
+                            truncated = True
+                            break
+            except TimeoutError:
+                truncated = True
+            text = bytes(body[:CRAWL_MAX_BYTES]).decode(response.encoding or "utf-8", errors="replace")
+            return True, Document(url=str(response.url), text=text, truncated=truncated)
     except Exception as e:  # noqa: F841
         return False, None
 
 
-async def httpx_bind_key(url: str, headers: dict, key: str = ""):
+async def httpx_bind_key(url: str, headers: dict, key: str = "", document_store=None):
+    if document_store is not None:
+        document = await document_store.get_async(url)
+        if document is not None:
+            return True, document, url, key
+    if FC_OFFLINE:
+        return False, None, url, key
     flag, response = await httpx_get(url, headers)
+    # A cut-off body is fine for locating snippets but must not be reused as the full page
+    if flag and document_store is not None and not response.truncated:
+        await document_store.put_async(url, response.text, final_url=response.url)
     return flag, response, url, key
 
 
-def crawl_web(query_url_dict: dict):
-    tasks = list()
-    for query, urls in query_url_dict.items():
-        for url in urls:
-            task = httpx_bind_key(url=url, headers=headers, key=query)
-            tasks.append(task)
-    asyncio.set_event_loop(asyncio.SelectorEventLoop())
-    loop = asyncio.get_event_loop()
-    responses = loop.run_until_complete(asyncio.gather(*tasks))
-    return responses
+async def crawl_web(query_url_dict: dict, document_store=None, timeout: float = None):
+    """Fetch every URL of every query concurrently.
+
+    Args:
+        query_url_dict (dict): a dictionary of queries and the URLs to fetch for them.
+        document_store (DocumentStore, optional): store that pages are read from and saved to.
+        timeout (float, optional): seconds to wait for all fetches; the ones still running
+            are cancelled and reported with a ``None`` flag.
+
+    Returns:
+        list[tuple]: one ``(flag, response, url, query)`` per URL, in input order.
+    """
+    keys = [(url, query) for query, urls in query_url_dict.items() for url in urls]
+    tasks = [
+        asyncio.ensure_future(httpx_bind_key(url=url, headers=headers, key=query, document_store=document_store))
+        for url, query in keys
+    ]
+    if not tasks:
+        return []
+    try:
+        _, pending = await asyncio.wait(tasks, timeout=timeout)
+    except asyncio.CancelledError:
+        for task in tasks:
+            task.cancel()
+        raise
+    for task in pending:
+        task.cancel()
+    if pending:
+        await asyncio.gather(*pending, return_exceptions=True)
+    return [
+        (None, None, url, query) if task in pending else task.result()
+        for task, (url, query) in zip(tasks, keys)
+    ]
 
 
 # @backoff.on_exception(backoff.expo, (requests.exceptions.RequestException, requests.exceptions.Timeout), max_tries=1,max_time=3)
@@ -77,17 +336,10 @@ def parse_response(response: requests.Response, url: str, query: str = None):
     html_content = response.text
     url = url
     try:
-        soup = bs4.BeautifulSoup(html_content, "html.parser")
-        texts = soup.findAll(text=True)
-        # Filter out invisible text from the page.
-        visible_text = filter(is_tag_visible, texts)
+        # Visible text with spacing cleaned up
+        web_text = extract_text(html_content)
     except Exception as _:  # noqa: F841
         return None, url, query
-
-    # Returns all the text concatenated as a string.
-    web_text = " ".join(t.strip() for t in visible_text).strip()
-    # Clean up spacing.
-    web_text = " ".join(web_text.split())
     return web_text, url, query
 
 
@@ -110,17 +362,10 @@ def scrape_url(url: str, timeout: float = 3):
 
     # Extract out all text from the tags
     try:
-        soup = bs4.BeautifulSoup(response.text, "html.parser")
-        texts = soup.findAll(text=True)
-        # Filter out invisible text from the page.
-        visible_text = filter(is_tag_visible, texts)
+        # Visible text with spacing cleaned up
+        web_text = extract_text(response.text)
     except Exception as _:  # noqa: F841
         return None, url
-
-    # Returns all the text concatenated as a string.
-    web_text = " ".join(t.strip() for t in visible_text).strip()
-    # Clean up spacing.
-    web_text = " ".join(web_text.split())
     return web_text, url
 
 
@@ -0,0 +1,13 @@
+import asyncio
+from fc.job_queue import JobQueue
+from pusher_api import pusher_client
+
+async def push_job_update(job):
+    # Results can exceed Pusher's message size limit, so clients fetch them from /jobs/{job_id}
+    await asyncio.to_thread(pusher_client.trigger, 'jobs-channel', 'job-complete', {
+        'job_id': job['id'],
+        'kind': job['kind'],
+        'status': job['status']
+    })
+
+job_queue = JobQueue(notify=push_job_update)
@@ -1,10 +1,9 @@
+import asyncio
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 import uvicorn
 from routes.news_fetch import news_router
 from routes.user_inputs import input_router
-import nest_asyncio
-nest_asyncio.apply()
 from fc.newsfetcher import NewsFetcher
 import os
 from contextlib import asynccontextmanager
@@ -18,12 +17,17 @@ from routes.deepfake_audio import deepfake_audio_router
 from routes import video_broadcast
 from routes.nlp_analysis import nlp_router
 from routes.deepfake_detection import deepfake_router
+from routes.jobs import jobs_router
+from job_queue_instance import job_queue
+from fc.web_helper import close_crawler_client
+from fc.serper_dispatcher import close_serper_client
+from fc.parse_pool import shutdown_parse_pool, warm_parse_pool
 
 news_fetcher = NewsFetcher()
 
 async def fetch_and_broadcast_news():
     try:
-        news_data = news_fetcher.process_single_news()
+        news_data = await news_fetcher.process_single_news()
 
         if news_data["status"] == "refresh":
             pusher_client.trigger('news-channel', 'refresh-news', {
@@ -67,10 +71,16 @@ async def lifespan(app: FastAPI):
     else:
         print("News database already initialized.")
     
+    print("\nStarting HTML parse workers...")
+    await asyncio.to_thread(warm_parse_pool)
+    
     print("\nScheduling news fetching job...")
     scheduler.add_job(fetch_and_broadcast_news, 'interval', seconds=90)
     # await fetch_and_broadcast_news()
     scheduler.start()
+
+    print("\nStarting background job workers...")
+    await job_queue.start()
     
     print("\n" + "="*60)
     print("Server is ready! Listening on http://127.0.0.1:8000")
@@ -80,7 +90,11 @@ async def lifespan(app: FastAPI):
     yield
     
     print("\nShutting down server...")
+    await job_queue.stop()
     scheduler.shutdown()
+    await close_crawler_client()
+    await close_serper_client()
+    shutdown_parse_pool()
     print("Server stopped.")
 
 app = FastAPI(lifespan=lifespan)
@@ -97,6 +111,7 @@ app.add_middleware(
 app.include_router(news_router, tags=["News"])
 app.include_router(input_router, tags=["User Inputs"])
 app.include_router(router, tags=["User Broadcast"])
+app.include_router(jobs_router, tags=["Jobs"])
 app.include_router(video_router, tags=["Video Analysis"])
 app.include_router(image_router, tags=["Image Analysis"])
 app.include_router(audio_router, tags=["Audio Analysis"])
@@ -0,0 +1,19 @@
+from fastapi import APIRouter, HTTPException
+from job_queue_instance import job_queue
+
+jobs_router = APIRouter()
+
+@jobs_router.get("/jobs/{job_id}")
+async def get_job(job_id: str):
+    job = job_queue.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Job not found")
+    return {"status": "success", "content": job}
+
+@jobs_router.delete("/jobs/{job_id}")
+async def cancel_job(job_id: str):
+    if job_queue.get(job_id) is None:
+        raise HTTPException(status_code=404, detail="Job not found")
+    if not job_queue.cancel(job_id):
+        raise HTTPException(status_code=409, detail="Job already finished")
+    return {"status": "success", "content": job_queue.get(job_id)}
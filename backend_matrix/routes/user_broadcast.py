@@ -1,4 +1,4 @@
-from fastapi import APIRouter
+from fastapi import APIRouter, HTTPException
 from pydantic import BaseModel
 from fc.news_summ import get_news
 from fc.fact_checker import FactChecker
@@ -7,6 +7,7 @@ from datetime import datetime
 import os
 from pusher_api import pusher_client
 from factcheck_instance import fact_checker_instance
+from job_queue_instance import job_queue
 
 router = APIRouter()
 db_service = DatabaseService()
@@ -21,16 +22,16 @@ class TranscriptInput(BaseModel):
     title: str = "Transcript Analysis"
     user_name: str = "System"
 
-@router.post("/user-broadcast")
-async def create_user_broadcast(user_input: UserInput):
+async def publish_user_broadcast(user_input: dict):
+    """Fact-check a user broadcast, store it and push it to the user channel"""
     fact_checker = fact_checker_instance
     
-    factcheck_result = fact_checker.generate_report(user_input.text)
+    factcheck_result = await fact_checker.generate_report(user_input["text"])
     
     broadcast_data = {
-        "title": user_input.title,
-        "text": user_input.text,
-        "user_name": user_input.name,
+        "title": user_input["title"],
+        "text": user_input["text"],
+        "user_name": user_input["name"],
         "factcheck": factcheck_result,
         "timestamp": datetime.now().isoformat()
     }
@@ -41,6 +42,20 @@ async def create_user_broadcast(user_input: UserInput):
     # Trigger pusher event
     pusher_client.trigger('user-channel', 'new-broadcast', broadcast_data)
     
+    return broadcast_data
+
+job_queue.register("user_broadcast", publish_user_broadcast)
+
+@router.post("/user-broadcast")
+async def create_user_broadcast(user_input: UserInput, background: bool = False, priority: int = 0):
+    if fact_checker_instance is None:
+        raise HTTPException(status_code=500, detail="Fact checker not initialized")
+
+    if background:
+        job_id = job_queue.submit("user_broadcast", user_input.model_dump(), priority=priority)
+        return {"status": "queued", "data": {"job_id": job_id}}
+
+    broadcast_data = await publish_user_broadcast(user_input.model_dump())
     return {"status": "success", "data": broadcast_data}
 
 @router.get("/user-broadcasts")
@@ -56,7 +71,7 @@ async def process_transcript(transcript_input: TranscriptInput):
     print(transcript_input)
     
     # Generate fact check report for the transcript
-    factcheck_result = fact_checker.generate_report(transcript_input.transcript)
+    factcheck_result = await fact_checker.generate_report(transcript_input.transcript)
     
     # Create the broadcast data structure
     broadcast_data = {
@@ -1,11 +1,15 @@
-from .news_summ import get_news
+from .news_summ import get_news_async
+import json
 from newsapi.newsapi_client import NewsApiClient
 from fastapi import APIRouter, HTTPException
+from fastapi.responses import StreamingResponse
 import os
 from dotenv import load_dotenv
 from factcheck_instance import fact_checker_instance
+from job_queue_instance import job_queue
 
 from pydantic import BaseModel
+from typing import List
 
 class UrlInput(BaseModel):
     url: str
@@ -13,6 +17,9 @@ class UrlInput(BaseModel):
 class TextInput(BaseModel):
     text: str
 
+class BatchTextInput(BaseModel):
+    texts: List[str]
+
 class SearchQuery(BaseModel):
     query: str
 
@@ -21,8 +28,43 @@ class NewsSelectionInput(BaseModel):
 
 load_dotenv()
 
+# Same size as a fetch_initial_news batch
+MAX_BATCH_SIZE = 100
+
 input_router = APIRouter()
 
+def build_fact_check_content(fact_check_result):
+    """Shape a generate_report result the way the fact-check routes return it"""
+    return {
+        "fact_check_result": {
+            "detailed_analysis" : {
+                "overall_analysis" : fact_check_result.get("detailed_analysis", {}).get("overall_analysis", {}),
+                "claim_analysis" : fact_check_result.get("detailed_analysis", {}).get("claim_analysis", []),
+                "source_analysis" : fact_check_result.get("source_credibility", [])
+            }
+        },
+        "sources": fact_check_result.get("sources", [])
+    }
+
+# Keep proxies from buffering the stream until it ends
+SSE_HEADERS = {"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+
+def sse_event(event: str, data) -> str:
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
+
+async def stream_fact_check(text: str):
+    """Server-sent events for each fact-check stage, ending with a ``result`` event"""
+    try:
+        async for stage, data in fact_checker_instance.generate_report_stream(text):
+            if stage == "report":
+                yield sse_event("result", {"status": "success", "content": build_fact_check_content(data)})
+            else:
+                yield sse_event(stage, data)
+    except Exception as e:
+        import traceback
+        print(f"Error in streaming fact check: {str(e)}\n{traceback.format_exc()}")
+        yield sse_event("error", {"status": "error", "content": str(e)})
+
 @input_router.post("/search-news")
 async def search_news(search_data: SearchQuery):
     try:
@@ -52,8 +94,8 @@ async def fact_check_selected_news(selection: NewsSelectionInput):
         if not selection.news_url or not selection.news_url.strip():
             raise HTTPException(status_code=400, detail="News URL cannot be empty")
             
-        # Get the news content using the existing get_news function
-        news_result = get_news(selection.news_url)
+        # Get the news content without blocking the event loop
+        news_result = await get_news_async(selection.news_url)
         
         if news_result.get('status') == 'error' or len(news_result.get("summary", "")) == 0:
             return {
@@ -67,7 +109,7 @@ async def fact_check_selected_news(selection: NewsSelectionInput):
             raise HTTPException(status_code=500, detail="Fact checker not initialized")
         
         # Generate the fact check report
-        fact_check_result = fact_checker.generate_report(news_result.get('summary', ''))
+        fact_check_result = await fact_checker.generate_report(news_result.get('summary', ''))
         
         if not fact_check_result:
             raise HTTPException(status_code=500, detail="Fact check failed to generate results")
@@ -93,44 +135,61 @@ async def fact_check_selected_news(selection: NewsSelectionInput):
         print(error_detail)
         raise HTTPException(status_code=500, detail=str(e))
 
+async def fact_check_url(url: str):
+    """Fetch the article at ``url`` and fact-check it, returning the route response"""
+    # Only the body is fact-checked, it is not returned
+    news_text = await get_news_async(url, with_text=True)
+  
+    if news_text.get('status') == 'error':
+        return {
+            "status": "error",
+            "content": "Unable to fetch the news from the url. Please try a different link"
+        }
+        
+    # Run fact check - it will be run through transformation pipeline
+    fact_check_result1 = await fact_checker_instance.generate_report(news_text.get('text', ''))
+    
+    if not fact_check_result1:
+        raise RuntimeError("Fact check failed to generate results")
+    
+    #return an object with fact check result and visualization data, and explanation
+    return {
+        "status": "success",
+        "content": build_fact_check_content(fact_check_result1)
+    }
+
+async def fact_check_text(text: str):
+    """Fact-check ``text``, returning the route response"""
+    # Run fact check - it will be run through transformation pipeline
+    fact_check_result1 = await fact_checker_instance.generate_report(text)
+    
+    if not fact_check_result1:
+        raise RuntimeError("Fact check failed to generate results")
+
+    #return an object with fact check result and visualization data, and explanation
+    return {
+        "status": "success",
+        "content": build_fact_check_content(fact_check_result1)
+    }
+
+job_queue.register("fc_url", lambda payload: fact_check_url(payload["url"]))
+job_queue.register("fc_text", lambda payload: fact_check_text(payload["text"]))
+
 @input_router.post("/get-fc-url")
-async def get_fc_url(input_data: UrlInput):
+async def get_fc_url(input_data: UrlInput, background: bool = False, priority: int = 0):
     try:
         if not input_data.url or not input_data.url.strip():
             raise HTTPException(status_code=400, detail="URL cannot be empty")
-            
-        news_text = get_news(input_data.url)
-      
-        if news_text.get('status') == 'error':
-            return {
-                "status": "error",
-                "content": "Unable to fetch the news from the url. Please try a different link"
-            }
         
         fact_checker = fact_checker_instance
         if fact_checker is None:
             raise HTTPException(status_code=500, detail="Fact checker not initialized")
-            
-        # Run fact check - it will be run through transformation pipeline
-        fact_check_result1 = fact_checker.generate_report(news_text.get('text', ''))
-        
-        if not fact_check_result1:
-            raise HTTPException(status_code=500, detail="Fact check failed to generate results")
-        
-        #return an object with fact check result and visualization data, and explanation
-        return {
-            "status": "success",
-            "content": {
-                "fact_check_result": {
-                    "detailed_analysis" : {
-                        "overall_analysis" : fact_check_result1.get("detailed_analysis", {}).get("overall_analysis", {}),
-                        "claim_analysis" : fact_check_result1.get("detailed_analysis", {}).get("claim_analysis", []),
-                        "source_analysis" : fact_check_result1.get("source_credibility", [])
-                    }
-                },
-                "sources": fact_check_result1.get("sources", [])
-            }
-        }
+
+        if background:
+            job_id = job_queue.submit("fc_url", {"url": input_data.url}, priority=priority)
+            return {"status": "queued", "content": {"job_id": job_id}}
+
+        return await fact_check_url(input_data.url)
     except HTTPException:
         raise
     except Exception as e:
@@ -140,7 +199,7 @@ async def get_fc_url(input_data: UrlInput):
         raise HTTPException(status_code=500, detail=str(e))
     
 @input_router.post("/get-fc-text")
-async def get_fc_text(input_data: TextInput):
+async def get_fc_text(input_data: TextInput, background: bool = False, priority: int = 0):
     try:
         if not input_data.text or not input_data.text.strip():
             raise HTTPException(status_code=400, detail="Text cannot be empty")
@@ -148,31 +207,88 @@ async def get_fc_text(input_data: TextInput):
         fact_checker = fact_checker_instance
         if fact_checker is None:
             raise HTTPException(status_code=500, detail="Fact checker not initialized")
+
+        if background:
+            job_id = job_queue.submit("fc_text", {"text": input_data.text}, priority=priority)
+            return {"status": "queued", "content": {"job_id": job_id}}
             
-        # Run fact check - it will be run through transformation pipeline
-        fact_check_result1 = fact_checker.generate_report(input_data.text)
-        
-        if not fact_check_result1:
-            raise HTTPException(status_code=500, detail="Fact check failed to generate results")
-   
-        #return an object with fact check result and visualization data, and explanation
-        return {
-            "status": "success",
-            "content": {
-                "fact_check_result": {
-                    "detailed_analysis" : {
-                        "overall_analysis" : fact_check_result1.get("detailed_analysis", {}).get("overall_analysis", {}),
-                        "claim_analysis" : fact_check_result1.get("detailed_analysis", {}).get("claim_analysis", []),
-                        "source_analysis" : fact_check_result1.get("source_credibility", [])
-                    }
-                },
-                "sources": fact_check_result1.get("sources", [])
-            }
-        }
+        return await fact_check_text(input_data.text)
     except HTTPException:
         raise
     except Exception as e:
         import traceback
         error_detail = f"Error in fact checking: {str(e)}\n{traceback.format_exc()}"
         print(error_detail)
-        raise HTTPException(status_code=500, detail=str(e))
\ No newline at end of file
+        raise HTTPException(status_code=500, detail=str(e))
+
+@input_router.post("/get-fc-text/stream")
+async def get_fc_text_stream(input_data: TextInput):
+    if not input_data.text or not input_data.text.strip():
+        raise HTTPException(status_code=400, detail="Text cannot be empty")
+    if fact_checker_instance is None:
+        raise HTTPException(status_code=500, detail="Fact checker not initialized")
+
+    return StreamingResponse(stream_fact_check(input_data.text), media_type="text/event-stream", headers=SSE_HEADERS)
+
+@input_router.post("/get-fc-url/stream")
+async def get_fc_url_stream(input_data: UrlInput):
+    if not input_data.url or not input_data.url.strip():
+        raise HTTPException(status_code=400, detail="URL cannot be empty")
+    if fact_checker_instance is None:
+        raise HTTPException(status_code=500, detail="Fact checker not initialized")
+
+    async def event_stream():
+        news_text = await get_news_async(input_data.url, with_text=True)
+        if news_text.get('status') == 'error':
+            yield sse_event("error", {
+                "status": "error",
+                "content": "Unable to fetch the news from the url. Please try a different link"
+            })
+            return
+        yield sse_event("article", {"title": news_text.get('title', ''), "url": input_data.url})
+        async for event in stream_fact_check(news_text.get('text') or news_text.get('summary', '')):
+            yield event
+
+    return StreamingResponse(event_stream(), media_type="text/event-stream", headers=SSE_HEADERS)
+
+@input_router.post("/get-fc-batch")
+async def get_fc_batch(input_data: BatchTextInput):
+    # Positions in input_data.texts of the non-empty texts, so item indices refer to the request
+    positions = [i for i, text in enumerate(input_data.texts) if text and text.strip()]
+    texts = [input_data.texts[i] for i in positions]
+    if not texts:
+        raise HTTPException(status_code=400, detail="Texts cannot be empty")
+    if len(input_data.texts) > MAX_BATCH_SIZE:
+        raise HTTPException(status_code=400, detail=f"A batch can contain at most {MAX_BATCH_SIZE} texts")
+    if fact_checker_instance is None:
+        raise HTTPException(status_code=500, detail="Fact checker not initialized")
+
+    async def event_stream():
+        for index, text in enumerate(input_data.texts):
+            if not text or not text.strip():
+                yield sse_event("item", {"index": index, "status": "error", "content": "Text cannot be empty"})
+        reports = fact_checker_instance.generate_reports(texts)
+        try:
+            async for position, fact_check_result in reports:
+                index = positions[position]
+                if "error" in fact_check_result:
+                    yield sse_event("item", {"index": index, "status": "error", "content": fact_check_result["error"]})
+                else:
+                    yield sse_event("item", {
+                        "index": index,
+                        "status": "success",
+                        # Some evidence missed the retrieval deadline and only its search snippet was used
+                        "timed_out": fact_check_result["timed_out"],
+                        "content": build_fact_check_content(fact_check_result)
+                    })
+        except Exception as e:
+            import traceback
+            print(f"Error in batch fact checking: {str(e)}\n{traceback.format_exc()}")
+            yield sse_event("error", {"status": "error", "content": str(e)})
+            return
+        finally:
+            # Closed right away when the client disconnects, so unfinished items are cancelled
+            await reports.aclose()
+        yield sse_event("done", {"status": "success", "count": len(input_data.texts)})
+
+    return StreamingResponse(event_stream(), media_type="text/event-stream", headers=SSE_HEADERS)
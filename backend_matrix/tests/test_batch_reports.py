@@ -0,0 +1,66 @@
+import asyncio
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# Needs the Gemini and Groq clients installed, as in the server's environment
+fact_checker = pytest.importorskip("fc.fact_checker")
+
+from fc.report_cache import ReportCache  # noqa: E402
+
+
+class _SearchClient:
+    async def retrieve_evidence(self, claim_queries_dict, document_store=None):
+        # Pages for the slow claim missed the retrieval deadline and kept their search snippet
+        return {
+            query: [{"url": f"https://example.com/{len(query)}", "text": query, "degraded": query.startswith("slow")}]
+            for query in claim_queries_dict
+        }
+
+
+class StubFactChecker(fact_checker.FactChecker):
+    """Fact checker whose model calls are stubbed, counting the reports it builds."""
+
+    def __init__(self):
+        self.search_client = _SearchClient()
+        self.report_cache = ReportCache()
+        self.built = []
+
+    async def generate_verification_questions(self, claim):
+        return {"questions": [f"{claim.lower()}?"]}
+
+    async def _extract_evidence(self, evidence_urls, document_store, snippet_fallbacks=None, **kwargs):
+        return [snippet_fallbacks.get(url, "article") for url in evidence_urls], evidence_urls
+
+    async def _build_report(self, news_summ, evidences, sources, questions=(), degraded_sources=None):
+        self.built.append(news_summ)
+        await asyncio.sleep(0.01)
+        return {"detailed_analysis": {"verdict": "supported"}, "sources": sources, "degraded_sources": degraded_sources}
+
+
+def test_batch_items_share_the_report_cache(tmp_path, monkeypatch):
+    monkeypatch.setattr("fc.kv_store.CACHE_DIR", str(tmp_path))
+    checker = StubFactChecker()
+
+    async def collect(texts):
+        return dict([item async for item in checker.generate_reports(texts)])
+
+    async def run():
+        first, second = await asyncio.gather(
+            collect(["Claim one", "claim  ONE", "Slow claim"]),
+            collect(["Claim one"]),
+        )
+        return first, second, await collect(["CLAIM ONE"])
+
+    first, second, cached = asyncio.run(run())
+    # Duplicates within and across concurrent batches are checked once, then served from the cache
+    assert sorted(checker.built) == ["Claim one", "Slow claim"]
+    assert [first[i]["original_text"] for i in range(3)] == ["Claim one", "claim  ONE", "Slow claim"]
+    assert second[0]["sources"] == first[0]["sources"]
+    assert cached[0]["original_text"] == "CLAIM ONE"
+    # Items whose evidence was cut off by the deadline are flagged
+    assert [first[i]["timed_out"] for i in range(3)] == [False, False, True]
+    assert not second[0]["timed_out"] and not cached[0]["timed_out"]
@@ -0,0 +1,65 @@
+import asyncio
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from fc.bounded_chat import BoundedChat  # noqa: E402
+
+
+class _Response:
+    def __init__(self, text):
+        self.text = text
+
+
+class RecordingModel:
+    """Stub Gemini model recording how many turns and characters every call sends."""
+
+    def __init__(self):
+        self.prompt_sizes = []
+
+    async def generate_content_async(self, contents):
+        self.prompt_sizes.append((len(contents), sum(len(part) for turn in contents for part in turn["parts"])))
+        await asyncio.sleep(0)
+        return _Response("[]")
+
+
+def test_request_n_costs_the_same_as_request_1():
+    model = RecordingModel()
+    chat = BoundedChat(model, max_turns=0)
+
+    async def run():
+        for _ in range(50):
+            await chat.send_message_async("rate these sources")
+
+    asyncio.run(run())
+    assert len(set(model.prompt_sizes)) == 1
+
+
+def test_history_is_bounded_and_kept_per_session():
+    model = RecordingModel()
+    chat = BoundedChat(model, max_turns=2)
+
+    async def report(i):
+        with chat.session():
+            for _ in range(5):
+                await chat.send_message_async(f"report {i}")
+            return chat.history
+
+    async def run():
+        return await asyncio.gather(*(report(i) for i in range(3)))
+
+    histories = asyncio.run(run())
+    for i, history in enumerate(histories):
+        assert len(history) == 4
+        assert all(turn["parts"] == [f"report {i}"] for turn in history if turn["role"] == "user")
+    # A report never sends more than its own two previous exchanges
+    assert max(turns for turns, _ in model.prompt_sizes) == 5
+    assert chat.history == []
+
+
+def test_negative_history_is_rejected():
+    with pytest.raises(ValueError):
+        BoundedChat(RecordingModel(), max_turns=-1)
@@ -0,0 +1,80 @@
+import asyncio
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# Needs the Gemini and Groq clients installed, as in the server's environment
+fact_checker = pytest.importorskip("fc.fact_checker")
+
+from fc.bounded_chat import BoundedChat  # noqa: E402
+from fc.document_store import DocumentStore  # noqa: E402
+
+URLS = ["https://www.reuters.com/a", "https://apnews.com/b", "https://reuters.com/c"]
+
+
+class _SearchClient:
+    async def search_queries(self, questions):
+        return [{"query": question} for question in questions]
+
+    async def retrieve_evidence(self, claim_queries_dict, document_store=None, serper_responses=None):
+        return {claim: [{"url": url, "text": f"evidence from {url}"} for url in URLS] for claim in claim_queries_dict}
+
+
+class StubFactChecker(fact_checker.FactChecker):
+    """Fact checker whose model calls are stubbed, recording when the stages run."""
+
+    def __init__(self):
+        self.search_client = _SearchClient()
+        self.gemini_chat_sources = BoundedChat(model=None)
+        self.rated = asyncio.Event()
+        self.rated_domains = []
+
+    async def generate_verification_questions(self, claim):
+        return {"questions": ["who said it?", "when?"]}
+
+    async def _rate_source_domains(self, urls):
+        self.rated_domains = sorted({fact_checker.domain_key(url) for url in urls})
+        self.rated.set()
+        return {domain: {"credibility_score": 90} for domain in self.rated_domains}
+
+    async def _extract_evidence(self, evidence_urls, document_store, emit=None, **kwargs):
+        # Credibility must be rated while the articles are still being extracted
+        await asyncio.wait_for(self.rated.wait(), timeout=1)
+        sources = evidence_urls[:2]
+        return [f"summary of {url}" for url in sources], sources
+
+    async def _generate_enhanced_report(self, news_summ, evidences):
+        return {"verdict": "supported", "evidence_count": len(evidences)}
+
+
+def test_report_graph_runs_every_stage():
+    checker = StubFactChecker()
+
+    async def run():
+        graph = checker._report_graph("The claim", DocumentStore())
+        return await graph.run(), graph.timings
+
+    results, timings = asyncio.run(run())
+    assert set(timings) == {
+        "questions", "search", "evidence", "credibility", "extraction", "source_credibility", "ranking", "analysis"
+    }
+    assert checker.rated_domains == ["apnews.com", "reuters.com"]
+    # Ratings are joined onto the sources shown in the report only
+    assert [rating["url"] for rating in results["source_credibility"]] == URLS[:2]
+    assert results["analysis"]["evidence_count"] == 2
+
+
+def test_streamed_stages_end_with_the_report():
+    checker = StubFactChecker()
+    stages = []
+
+    async def emit(stage, data):
+        stages.append(stage)
+
+    report = asyncio.run(checker._generate_report_uncached("The claim", emit=emit))
+    assert stages[0] == "questions" and "source_credibility" in stages and "detailed_analysis" in stages
+    assert report["sources"] == URLS[:2]
+    assert len(report["source_credibility"]) == 2
@@ -0,0 +1,28 @@
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from fc.snippet_locator import SnippetLocator  # noqa: E402
+
+
+PAGE = (
+    "Jan 5, 2024 Markets were calm ahead of the meeting. "
+    "After two days of talks the central bank held rates steady and signalled patience."
+)
+
+
+def test_anchored_passage_wins_over_earlier_fuzzy_one():
+    locator = SnippetLocator(PAGE)
+    start, end = locator.locate("Jan 6, 2024 ... central bank held rates steady")
+    assert PAGE[start:end] == "central bank held rates steady"
+
+
+def test_passage_with_most_matched_words_wins():
+    locator = SnippetLocator(PAGE)
+    start, end = locator.locate("ahead of the ... the central bank held rates steady and signalled")
+    assert PAGE[start:end] == "the central bank held rates steady and signalled"
+
+
+def test_unknown_snippet_is_not_located():
+    assert SnippetLocator(PAGE).locate("nothing like this appears here") is None